@@ -1,13 +1,11 @@
 import os
 import sys
-from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QFileDialog, QSplitter, QFrame, QStatusBar, 
-                             QListWidgetItem, QAbstractItemView, QLineEdit, QSizePolicy)
-from PyQt6.QtCore import Qt, QUrl, QSize, QFileInfo
-from PyQt6.QtGui import QIcon, QDesktopServices, QColor, QCursor
-from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QFileDialog, QSplitter, QFrame, QStatusBar, QListWidgetItem, QAbstractItemView, QLineEdit, QSizePolicy, QMenu
-
-
+from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
+                             QFileDialog, QSplitter, QFrame, QStatusBar,
+                             QListWidgetItem, QAbstractItemView, QLineEdit, QSizePolicy,
+                             QMenu, QStackedWidget, QLabel)
+from PyQt6.QtCore import Qt, QUrl, QSize, QFileInfo, QTimer
+from PyQt6.QtGui import QIcon, QDesktopServices, QColor, QCursor, QPixmap
 
 # --- Fluent Widgets ---
 from qfluentwidgets import (FluentWindow, SubtitleLabel, BodyLabel, StrongBodyLabel,
@@ -20,16 +18,47 @@ from qfluentwidgets import (FluentWindow, SubtitleLabel, BodyLabel, StrongBodyLa
 # --- 自定义模块 ---
 from modules.topic_manager import TopicManager
 from modules.shortcut_manager import ShortcutManager
-from modules.ai_assistant import AIWebViewer # Corrected from AIWebViewerManager to AIWebViewer
+from modules import folder_cache
+# 注意：AIWebViewer (QtWebEngine) 改为懒加载，首次使用时才导入
 
-from PyQt6.QtWidgets import QStackedWidget, QLabel, QVBoxLayout, QWidget
-from PyQt6.QtGui import QPixmap, QColor
-from PyQt6.QtCore import Qt, QUrl
 from modules.pdf_widgets import PDFViewerWidget
 from modules.draggable_list import DraggableListWidget
 from modules.help_dialog import HelpDialog
 from modules.edit_tools import EditToolsManager
 
+# 应用图标：QIcon 构造会触发磁盘 I/O 与解码，模块级缓存只做一次
+_APP_ICON = None
+
+def _get_app_icon():
+    global _APP_ICON
+    if _APP_ICON is None:
+        if getattr(sys, 'frozen', False):
+            root_dir = getattr(sys, '_MEIPASS', os.path.dirname(sys.executable))
+        else:
+            root_dir = os.path.dirname(os.path.abspath(__file__))
+        icon_path = os.path.join(root_dir, 'Icons', 'LOGO.ico')
+        _APP_ICON = QIcon(icon_path) if os.path.exists(icon_path) else QIcon()
+    return _APP_ICON
+
+# 应用级 QSS：从文件读入并缓存，避免每次构造窗口时重复读取/解析
+_QSS_CACHE = None
+
+def _load_app_qss():
+    global _QSS_CACHE
+    if _QSS_CACHE is None:
+        if getattr(sys, 'frozen', False):
+            root_dir = getattr(sys, '_MEIPASS', os.path.dirname(sys.executable))
+        else:
+            root_dir = os.path.dirname(os.path.abspath(__file__))
+        qss_path = os.path.join(root_dir, 'Icons', 'app.qss')
+        try:
+            with open(qss_path, 'r', encoding='utf-8') as f:
+                _QSS_CACHE = f.read()
+        except OSError as e:
+            print(f"Failed to load app stylesheet: {e}")
+            _QSS_CACHE = ""
+    return _QSS_CACHE
+
 class MainWindow(FluentWindow):
     def __init__(self):
         super().__init__()
@@ -41,45 +70,34 @@ class MainWindow(FluentWindow):
         self._auto_load_default_folder()
 
     def _auto_load_default_folder(self):
-        if getattr(sys, 'frozen', False):
-            root_dir = os.path.dirname(sys.executable)
-        else:
-            root_dir = os.path.dirname(os.path.abspath(__file__))
-            
-        data_dir = os.path.join(root_dir, 'data')
+        data_dir = os.path.join(self._app_root, 'data')
         # 如果 data 文件夹不存在，自动创建
-        if not os.path.exists(data_dir):
-            try:
-                os.makedirs(data_dir)
-            except Exception as e:
-                print(f"Failed to create data folder: {e}")
-        
-        # 加载 data 文件夹
+        self._ensure_dir(data_dir)
+
+        # 加载 data 文件夹（启动时预览必然为空，跳过 clear）
         if os.path.isdir(data_dir):
-            self.load_folder(data_dir)
+            self.load_folder(data_dir, clear_viewer=False)
 
     def init_window_settings(self):
         setTheme(Theme.LIGHT)
         self.setWindowTitle("InsightPaper")
+
+        # 应用根目录（data/analysis 所在位置）- 只计算一次，打包后为可执行文件目录
+        if getattr(sys, 'frozen', False):
+            self._app_root = os.path.dirname(sys.executable)
+        else:
+            self._app_root = os.path.dirname(os.path.abspath(__file__))
+        self._analysis_root = os.path.join(self._app_root, 'analysis')
         self.resize(1400, 850)
         self.windowEffect.setMicaEffect(self.winId())
         
-        # Set Window Icon - 支持打包后的环境
-        # 对于打包的资源文件，使用 _MEIPASS（onefile 模式下的临时解压目录）
-        if getattr(sys, 'frozen', False):
-            root_dir = getattr(sys, '_MEIPASS', os.path.dirname(sys.executable))
-        else:
-            root_dir = os.path.dirname(os.path.abspath(__file__))
-        icon_path = os.path.join(root_dir, 'Icons', 'LOGO.ico')
-        if os.path.exists(icon_path):
-            self.setWindowIcon(QIcon(icon_path))
+        # Set Window Icon - 支持打包后的环境（模块级缓存，后续对话框可直接复用）
+        app_icon = _get_app_icon()
+        if not app_icon.isNull():
+            self.setWindowIcon(app_icon)
         
-        # 样式表优化
-        self.setStyleSheet("""
-            FluentWindow, QWidget#mainWorkspace { background-color: #f7f3ea; }
-            SimpleCardWidget { background-color: #fffdf7; border: 1px solid rgba(0,0,0,0.06); border-radius: 8px; }
-            QListWidget { background-color: rgba(255,255,255,0.95); border: 1px solid rgba(0,0,0,0.05); border-radius: 6px; }
-        """)
+        # 样式表优化（外置 QSS 文件，模块级缓存，仅首次读取）
+        self.setStyleSheet(_load_app_qss())
 
     def init_data_variables(self):
         self.current_folder = ""
@@ -98,6 +116,19 @@ class MainWindow(FluentWindow):
         # 初始化编辑工具管理器
         self.edit_tools_manager = EditToolsManager(self)
 
+        # 分析笔记防抖自动保存：合并连续按键，停止输入 400ms 后才写盘
+        self._analysis_save_timer = QTimer(self)
+        self._analysis_save_timer.setSingleShot(True)
+        self._analysis_save_timer.setInterval(400)
+        self._analysis_save_timer.timeout.connect(self._flush_analysis)
+        self._last_saved_analysis_hash = None
+
+        # analysis 路径缓存：同一篇论文重复点击直接命中
+        self._analysis_paths_cache = {}
+
+        # 已确认存在的目录集合：重复点击同一篇论文时跳过 makedirs 的逐级 stat
+        self._ensured_dirs = set()
+
     def init_ui(self):
         # 1. 导航栏设置
         self.navigationInterface.setExpandWidth(300)
@@ -120,6 +151,8 @@ class MainWindow(FluentWindow):
         # Left Panel (Container)
         self.left_panel = self._create_left_panel()
         left_container = SimpleCardWidget()
+        # 固定宽度只设置在外层容器上，内层面板跟随布局，避免 show 时的二次布局
+        left_container.setFixedWidth(300)
         left_layout = QVBoxLayout(left_container)
         left_layout.setContentsMargins(0, 0, 0, 0)
         left_layout.addWidget(self.left_panel)
@@ -140,13 +173,12 @@ class MainWindow(FluentWindow):
         right_pdf_layout.addWidget(self.pdf_viewer)
         self.right_content_stack.addWidget(right_pdf_container)
 
-        # Page 2: AI Assistant
-        self.ai_assistant_interface = AIWebViewer()
-        # Connect service changed signal
-        self.ai_assistant_interface.serviceChanged.connect(lambda k: setattr(self, 'current_ai_service', k))
-        # 连接关闭信号 - 点击关闭按钮返回 PDF 视图
-        self.ai_assistant_interface.closeRequested.connect(self.switch_to_pdf_viewer)
-        self.right_content_stack.addWidget(self.ai_assistant_interface)
+        # Page 2: AI Assistant (懒加载)
+        # QtWebEngine 初始化会启动 Chromium 渲染进程，开销占冷启动大头，
+        # 因此先放占位 QWidget，首次访问 ai_assistant_interface 时再构建
+        self._ai_assistant_interface = None
+        self._ai_placeholder = QWidget()
+        self.right_content_stack.addWidget(self._ai_placeholder)
 
         main_content_layout.addWidget(self.right_content_stack, 1)
         
@@ -162,15 +194,13 @@ class MainWindow(FluentWindow):
          
     def _create_left_panel(self):
         panel = QFrame()
-        panel.setFixedWidth(300) # Slightly wider for analysis text
         layout = QVBoxLayout(panel)
         layout.setContentsMargins(10, 10, 5, 10)
         layout.setSpacing(10)
 
         # Splitter to separate list and analysis
         splitter = QSplitter(Qt.Orientation.Vertical)
-        splitter.setHandleWidth(0)  # 隐藏分隔条句柄，使其不可拖动
-        splitter.setStyleSheet("QSplitter::handle { background-color: transparent; }")  # 确保不可交互
+        splitter.setHandleWidth(0)  # 隐藏分隔条句柄，使其不可拖动（宽度为 0 时无需再用 QSS 透明化）
         splitter.setChildrenCollapsible(False)
 
         # === 上部：论文列表 ===
@@ -232,14 +262,27 @@ class MainWindow(FluentWindow):
         return panel
 
     def save_current_analysis(self):
+        """Schedule a debounced auto-save of the analysis text"""
+        self._analysis_save_timer.start()
+
+    def _flush_analysis(self):
         """Auto-save analysis text to file"""
         if not hasattr(self, 'current_analysis_path') or not self.current_analysis_path:
             return
-            
+
         content = self.analysis_edit.toPlainText()
+        # 内容与上次保存一致时跳过写盘
+        content_hash = hash(content)
+        if content_hash == self._last_saved_analysis_hash:
+            return
         try:
-            with open(self.current_analysis_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # 二进制写临时文件后原子替换：跳过文本模式的编解码/换行转换，崩溃也不会留下半写文件
+            data = content.encode('utf-8')
+            tmp_path = self.current_analysis_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.current_analysis_path)
+            self._last_saved_analysis_hash = content_hash
         except Exception as e:
             print(f"Error saving analysis: {e}")
 
@@ -264,10 +307,28 @@ class MainWindow(FluentWindow):
         
 
 
+    @property
+    def ai_assistant_interface(self):
+        """首次访问时才构建 AIWebViewer，避免启动时初始化 QtWebEngine"""
+        if self._ai_assistant_interface is None:
+            from modules.ai_assistant import AIWebViewer
+            viewer = AIWebViewer()
+            # Connect service changed signal
+            viewer.serviceChanged.connect(lambda k: setattr(self, 'current_ai_service', k))
+            # 连接关闭信号 - 点击关闭按钮返回 PDF 视图
+            viewer.closeRequested.connect(self.switch_to_pdf_viewer)
+            # 用真实组件替换占位符 (保持在 Stack 的 index 1)
+            self.right_content_stack.removeWidget(self._ai_placeholder)
+            self._ai_placeholder.deleteLater()
+            self.right_content_stack.insertWidget(1, viewer)
+            self._ai_assistant_interface = viewer
+        return self._ai_assistant_interface
+
     def toggle_ai_assistant(self):
         """Switch to AI Assistant or Back"""
          # Simple toggle logic for stack
-        if self.right_content_stack.currentWidget() == self.ai_assistant_interface:
+        if self._ai_assistant_interface is not None and \
+           self.right_content_stack.currentWidget() == self._ai_assistant_interface:
             self.switch_to_pdf_viewer()
         else:
         # If using stack, we just switch to the AI service logic
@@ -286,24 +347,16 @@ class MainWindow(FluentWindow):
         self.right_content_stack.setCurrentWidget(self.ai_assistant_interface)
         
         # 2. Switch the inner stack of AI Assistant to the correct service
-        # Map key to method if needed, or directly use key if AIWebViewer supports it.
-        # The simplified AIWebViewer in 1.py/ai_assistant.py uses simplified methods or index switching.
-        if service_key == "chatgpt":
-            self.ai_assistant_interface.load_chatgpt()
-        elif service_key == "gemini":
-            self.ai_assistant_interface.load_gemini()
-        elif service_key == "doubao":
-            self.ai_assistant_interface.load_doubao()
-        elif service_key == "deepseek":
-            self.ai_assistant_interface.load_deepseek()
-        elif service_key == "grok":
-            self.ai_assistant_interface.load_grok()
-            
+        self.ai_assistant_interface.load_service(service_key)
+
+
         self.current_ai_service = service_key
 
     # Helper to switch back to PDF
     def switch_to_pdf_viewer(self):
-        self.right_content_stack.setCurrentIndex(0) # Index 0 is PDF Viewer
+        # 已在 PDF 视图时直接返回，避免重复的 currentChanged 信号和布局刷新
+        if self.right_content_stack.currentIndex() != 0:
+            self.right_content_stack.setCurrentIndex(0) # Index 0 is PDF Viewer
     
 
 
@@ -334,6 +387,40 @@ class MainWindow(FluentWindow):
         if folder_path:
             self.load_folder(folder_path)
 
+    def _analysis_paths(self, pdf_path):
+        """集中构建某篇论文 analysis 目录下的所有相关路径（带缓存）"""
+        cached = self._analysis_paths_cache.get(pdf_path)
+        if cached is not None:
+            return cached
+
+        pdf_name_no_ext = os.path.splitext(os.path.basename(pdf_path))[0]
+        target_dir = os.path.join(self._analysis_root, pdf_name_no_ext)
+        paths = {
+            'target_dir': target_dir,
+            'trans_path': os.path.join(target_dir, "Translation.pdf"),
+            'cache_original': os.path.join(target_dir, "cache_original"),
+            'cache_trans': os.path.join(target_dir, "cache_translation"),
+            'brush_path': os.path.join(target_dir, "marker.json"),
+            'brush_path_trans': os.path.join(target_dir, "marker_trans.json"),
+            'toc_path': os.path.join(target_dir, "toc_original.json"),
+            'toc_path_trans': os.path.join(target_dir, "toc_translation.json"),
+            'rotation_path': os.path.join(target_dir, "rotation.json"),
+            'rotation_path_trans': os.path.join(target_dir, "rotation_trans.json"),
+            'analysis_file': os.path.join(target_dir, "analysis.txt"),
+        }
+        self._analysis_paths_cache[pdf_path] = paths
+        return paths
+
+    def _ensure_dir(self, path):
+        """确保目录存在；已确认过的目录跳过 makedirs 的逐级 stat"""
+        if path in self._ensured_dirs:
+            return
+        try:
+            os.makedirs(path, exist_ok=True)
+            self._ensured_dirs.add(path)
+        except Exception as e:
+            print(f"Failed to create directory: {e}")
+
     def on_list_item_clicked(self, item):
         """处理列表项点击事件"""
         if not item:
@@ -343,100 +430,72 @@ class MainWindow(FluentWindow):
         item_type = data.get('type')
         
         if item_type == 'topic':
-            # 点击主题：展开/折叠
+            # 点击主题：展开/折叠（就地显示/隐藏，不重建列表）
             topic_name = data['name']
-            self.topic_manager.toggle_expand(topic_name)
-            self.topic_manager.refresh_list_display()
+            self.topic_manager.toggle_expand_in_place(topic_name)
         
         elif item_type == 'group':
             # 点击组：展开/折叠
             topic_name = data['topic']
             group_name = data['name']
             group_key = f"{topic_name}::{group_name}"
-            self.topic_manager.toggle_expand(group_key)
-            self.topic_manager.refresh_list_display()
+            self.topic_manager.toggle_expand_in_place(group_key)
         
         elif item_type == 'pdf':
             # 点击PDF：打开阅读
-            # 点击PDF：打开阅读
+            # 切换论文前先落盘未保存的分析内容（防抖期间可能有挂起的写入）
+            if self._analysis_save_timer.isActive():
+                self._analysis_save_timer.stop()
+                self._flush_analysis()
             self.switch_to_pdf_viewer()
             pdf_path = data['path']
             self.current_pdf_path = pdf_path
             filename = os.path.basename(pdf_path)
-            
+
             # --- Analysis Logic ---
-            # 1. Determine Analysis Root
-            if getattr(sys, 'frozen', False):
-                project_root = os.path.dirname(sys.executable)
-            else:
-                project_root = os.path.dirname(os.path.abspath(__file__))
-            analysis_root = os.path.join(project_root, 'analysis')
-            
-            # 2. Determine Specific Analysis Folder
-            pdf_name_no_ext = os.path.splitext(filename)[0]
-            target_dir = os.path.join(analysis_root, pdf_name_no_ext)
-            
-            # 3. Create Directory
+            # 1. 构建该论文 analysis 目录下的所有路径（带缓存）
+            paths = self._analysis_paths(pdf_path)
+            target_dir = paths['target_dir']
+
+            # 2. Create Directory
+            self._ensure_dir(target_dir)
+
+            # 3. 检查翻译版是否存在，存在则并排显示
+            # EAFP：单次 stat 代替 exists 探测
+            trans_path = paths['trans_path']
             try:
-                os.makedirs(target_dir, exist_ok=True)
-            except Exception as e:
-                print(f"Failed to create analysis dir: {e}")
-            
-            # 4. 检查翻译版是否存在，存在则并排显示
-            trans_path = os.path.join(target_dir, "Translation.pdf")
-            
-            # --- Define Cache Dirs ---
-            cache_original = os.path.join(target_dir, "cache_original")
-            cache_trans = os.path.join(target_dir, "cache_translation")
-            
-            # --- Brush/Marker File ---
-            brush_path = os.path.join(target_dir, "marker.json")
-            brush_path_trans = os.path.join(target_dir, "marker_trans.json")
-            
-            # --- TOC Files ---
-            toc_path = os.path.join(target_dir, "toc_original.json")
-            toc_path_trans = os.path.join(target_dir, "toc_translation.json") # Although currently unused for sidebar
-            
-            # --- Rotation State Files ---
-            rotation_path = os.path.join(target_dir, "rotation.json")
-            rotation_path_trans = os.path.join(target_dir, "rotation_trans.json")
-            
-            if os.path.exists(trans_path):
+                os.stat(trans_path)
+                has_trans = True
+            except OSError:
+                has_trans = False
+
+            if has_trans:
                 # 并排显示原文和翻译版
-                self.pdf_viewer.load_side_by_side(pdf_path, trans_path, cache_original, cache_trans, 
-                                                   brush_path=brush_path, brush_path2=brush_path_trans,
-                                                   rotation_path=rotation_path, rotation_path2=rotation_path_trans,
-                                                   toc_path=toc_path, toc_path2=toc_path_trans) # <--- Pass toc_path here? Wait, load_side_by_side definition only takes one toc_path? 
+                self.pdf_viewer.load_side_by_side(pdf_path, trans_path, paths['cache_original'], paths['cache_trans'],
+                                                   brush_path=paths['brush_path'], brush_path2=paths['brush_path_trans'],
+                                                   rotation_path=paths['rotation_path'], rotation_path2=paths['rotation_path_trans'],
+                                                   toc_path=paths['toc_path'], toc_path2=paths['toc_path_trans'])
                 self.status_bar.showMessage(f"正在阅读 (并排模式): {filename}")
             else:
                 # 仅显示原文
-                self.pdf_viewer.load_pdf(pdf_path, cache_dir=cache_original, brush_path=brush_path, rotation_path=rotation_path, toc_path=toc_path)
+                self.pdf_viewer.load_pdf(pdf_path, cache_dir=paths['cache_original'], brush_path=paths['brush_path'], rotation_path=paths['rotation_path'], toc_path=paths['toc_path'])
                 self.status_bar.showMessage(f"正在阅读: {filename}")
-            
-            # Switch to PDF view if not already
-            self.switch_to_pdf_viewer()
-            
-            # 5. Determine Analysis File Path
-            analysis_file_path = os.path.join(target_dir, "analysis.txt")
+
+            # 4. Determine Analysis File Path
+            analysis_file_path = paths['analysis_file']
             self.current_analysis_path = analysis_file_path
             
-            # 6. Load or Create File
-            if os.path.exists(analysis_file_path):
-                try:
-                    with open(analysis_file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    self.analysis_edit.setText(content)
-                except Exception as e:
-                    self.analysis_edit.setText(f"Error loading analysis: {e}")
-            else:
-                # Create empty file
-                try:
-                    with open(analysis_file_path, 'w', encoding='utf-8') as f:
-                        f.write("")
-                    self.analysis_edit.setText("")
-                except Exception as e:
-                    print(f"Failed to create analysis file: {e}")
-                    self.analysis_edit.setText("")
+            # 5. Load File (EAFP：直接尝试打开，不存在时延迟到首次保存才创建)
+            try:
+                with open(analysis_file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                self._last_saved_analysis_hash = hash(content)
+                self.analysis_edit.setText(content)
+            except FileNotFoundError:
+                self._last_saved_analysis_hash = hash("")
+                self.analysis_edit.setText("")
+            except Exception as e:
+                self.analysis_edit.setText(f"Error loading analysis: {e}")
     
     def load_folder(self, folder_path, clear_viewer=True):
         self.current_folder = folder_path
@@ -444,72 +503,92 @@ class MainWindow(FluentWindow):
         self.pdf_files = []
         # 清空现有的主题和组
         self.topic_manager.clear()
-        # 根据参数决定是否清空预览
-        if clear_viewer:
+        # 根据参数决定是否清空预览（从未加载过文档时无需清理）
+        if clear_viewer and self.current_pdf_path is not None:
             self.pdf_viewer.clear()
-        
+
+        # 批量填充期间禁用列表重绘和信号，避免每插入一项都触发布局/重绘
+        self.pdf_list_widget.setUpdatesEnabled(False)
+        self.pdf_list_widget.blockSignals(True)
         try:
             if not os.path.isdir(folder_path):
                 return
 
+            # 0. 尝试命中扫描缓存：目录树指纹未变化时直接复用上次结果
+            cached = folder_cache.load_cached_tree(folder_path)
+            if cached is not None:
+                self.pdf_files, self.topic_manager.topics = cached
+                # 与全量扫描保持一致：默认展开所有主题
+                self.topic_manager.expanded_items.update(self.topic_manager.topics.keys())
+                self.topic_manager.refresh_list_display()
+                total_count = len(self.pdf_files)
+                for t_data in self.topic_manager.topics.values():
+                    total_count += len(t_data['pdfs'])
+                    for g_pdfs in t_data['groups'].values():
+                        total_count += len(g_pdfs)
+                self.status_bar.showMessage(f"已加载 {total_count} 篇论文")
+                return
+
             # 1. 扫描根目录 (Level 0)
-            root_items = sorted(os.listdir(folder_path))
-            
-            for item in root_items:
-                full_path = os.path.join(folder_path, item)
-                
+            # 使用 os.scandir：DirEntry 自带文件类型信息，避免逐项 stat 调用
+            with os.scandir(folder_path) as it:
+                root_entries = sorted(it, key=lambda e: e.name)
+
+            # 总数随扫描累加，免去扫描结束后对 topics 的二次遍历
+            total_count = 0
+            for entry in root_entries:
                 # 情况 A：根目录下的 PDF -> 未分类论文
-                if os.path.isfile(full_path) and item.lower().endswith('.pdf'):
-                    self.pdf_files.append((item, full_path))
-                
+                if entry.is_file(follow_symlinks=False) and entry.name.lower().endswith('.pdf'):
+                    self.pdf_files.append((entry.name, entry.path))
+                    total_count += 1
+
                 # 情况 B：一级目录 -> 主题 (Topic)
-                elif os.path.isdir(full_path):
-                    topic_name = item
+                elif entry.is_dir(follow_symlinks=False):
+                    topic_name = entry.name
                     # 手动初始化主题结构，避免调用 add_topic 弹窗
                     self.topic_manager.topics[topic_name] = {'groups': {}, 'pdfs': []}
-                    
+
                     # 2. 扫描主题目录 (Level 1)
                     # 默认展开所有主题，以便直接看到组
                     self.topic_manager.expanded_items.add(topic_name)
-                    
-                    topic_items = sorted(os.listdir(full_path))
-                    for t_item in topic_items:
-                        t_full_path = os.path.join(full_path, t_item)
-                        
+
+                    with os.scandir(entry.path) as t_it:
+                        topic_entries = sorted(t_it, key=lambda e: e.name)
+                    for t_entry in topic_entries:
                         # 情况 B-1: 主题下的 PDF -> 该主题的直接论文
-                        if os.path.isfile(t_full_path) and t_item.lower().endswith('.pdf'):
-                            self.topic_manager.add_pdf_to_topic(t_full_path, topic_name)
-                        
+                        if t_entry.is_file(follow_symlinks=False) and t_entry.name.lower().endswith('.pdf'):
+                            if self.topic_manager.add_pdf_to_topic(t_entry.path, topic_name):
+                                total_count += 1
+
                         # 情况 B-2: 二级目录 -> 组 (Group)
-                        elif os.path.isdir(t_full_path):
-                            group_name = t_item
+                        elif t_entry.is_dir(follow_symlinks=False):
+                            group_name = t_entry.name
                             # 手动初始化组结构
                             self.topic_manager.topics[topic_name]['groups'][group_name] = []
-                            
+
                             # 3. 扫描组目录 (Level 2)
-                            group_items = sorted(os.listdir(t_full_path))
-                            for g_item in group_items:
-                                g_full_path = os.path.join(t_full_path, g_item)
-                                
+                            with os.scandir(t_entry.path) as g_it:
+                                group_entries = sorted(g_it, key=lambda e: e.name)
+                            for g_entry in group_entries:
                                 # 情况 B-2-1: 组下的 PDF -> 该组的论文
-                                if os.path.isfile(g_full_path) and g_item.lower().endswith('.pdf'):
-                                    self.topic_manager.add_pdf_to_group(g_full_path, topic_name, group_name)
+                                if g_entry.is_file(follow_symlinks=False) and g_entry.name.lower().endswith('.pdf'):
+                                    if self.topic_manager.add_pdf_to_group(g_entry.path, topic_name, group_name):
+                                        total_count += 1
             
+            # 保存扫描结果，供下次启动跳过遍历
+            folder_cache.save_tree_cache(folder_path, self.pdf_files, self.topic_manager.topics)
+
             # 更新论文列表显示 (调用 TopicManager)
             self.topic_manager.refresh_list_display()
-            
-            # 计算总数
-            total_count = len(self.pdf_files)
-            for t_data in self.topic_manager.topics.values():
-                total_count += len(t_data['pdfs'])
-                for g_pdfs in t_data['groups'].values():
-                    total_count += len(g_pdfs)
-            
+
             self.status_bar.showMessage(f"已加载 {total_count} 篇论文")
             
         except Exception as e:
             self.status_bar.showMessage(f"加载失败: {str(e)}")
             print(f"Error loading folder: {e}")
+        finally:
+            self.pdf_list_widget.blockSignals(False)
+            self.pdf_list_widget.setUpdatesEnabled(True)
     
 
     
@@ -560,18 +639,8 @@ class MainWindow(FluentWindow):
             filename = os.path.basename(pdf_path)
             
             # 双击时切换到仅显示原文
-            # 双击时切换到仅显示原文
-            
-            # Logic to find Analysis Dir (Replicated from click event, ideally helper method)
-            if getattr(sys, 'frozen', False):
-                project_root = os.path.dirname(sys.executable)
-            else:
-                project_root = os.path.dirname(os.path.abspath(__file__))
-            pdf_name_no_ext = os.path.splitext(filename)[0]
-            cache_original = os.path.join(project_root, 'analysis', pdf_name_no_ext, "cache_original")
-            brush_path = os.path.join(project_root, 'analysis', pdf_name_no_ext, "marker.json")
-            
-            self.pdf_viewer.load_pdf(pdf_path, cache_dir=cache_original, brush_path=brush_path)
+            paths = self._analysis_paths(pdf_path)
+            self.pdf_viewer.load_pdf(pdf_path, cache_dir=paths['cache_original'], brush_path=paths['brush_path'])
             self.status_bar.showMessage(f"正在阅读 (仅原文): {filename}")
 
     def handle_translation_request(self, text):
@@ -1,19 +1,48 @@
 import os
+import re
+from collections import namedtuple
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QStackedWidget, QHBoxLayout, 
                              QPushButton, QListWidget, QListWidgetItem, QLabel, QApplication, QFileDialog, QAbstractItemView)
-from PyQt6.QtCore import QUrl, Qt, QMimeData, QTimer, pyqtSignal, QObject, QSize, QProcess
+from PyQt6.QtCore import QUrl, Qt, QMimeData, QTimer, pyqtSignal, QObject, QSize, QProcess, QRunnable, QThreadPool
 import sys
 from PyQt6.QtGui import QDrag, QCursor, QDesktopServices
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage, QWebEngineDownloadRequest
+from PyQt6.QtWebEngineCore import (QWebEngineProfile, QWebEnginePage, QWebEngineDownloadRequest,
+                                   QWebEngineUrlRequestInterceptor, QWebEngineSettings)
 from qfluentwidgets import FluentIcon as FIF, Flyout, FlyoutAnimationType, TransparentToolButton, InfoBar, InfoBarPosition, RoundMenu, Action, MenuAnimationType
 
 # --- Simplified WebEnginePage (No complex injection) ---
+
+# 噪声过滤（预编译，javaScriptConsoleMessage 每条消息都会走一遍）
+_CONSOLE_FILTER_RE = re.compile(r'ResizeObserver|Content Security Policy')
+
+# 常见遥测/广告域名（按请求 host 匹配）
+_TRACKER_RE = re.compile(r'(google-analytics|doubleclick|googletagmanager|segment\.io|sentry\.io|hotjar)')
+
+class TrackerBlockInterceptor(QWebEngineUrlRequestInterceptor):
+    """在网络层拦截遥测/广告请求：请求不发出，渲染进程也省掉对应的 JS 解析"""
+    # 各服务一方域名白名单，避免误杀主站请求
+    _FIRST_PARTY = {
+        "chatgpt.com", "gemini.google.com", "www.doubao.com",
+        "chat.deepseek.com", "grok.com", "doc2x.noedgeai.com",
+        "scholar.google.com",
+    }
+
+    def interceptRequest(self, info):
+        host = info.requestUrl().host()
+        if host in self._FIRST_PARTY:
+            return
+        if _TRACKER_RE.search(host):
+            info.block(True)
+
 class WebEnginePage(QWebEnginePage):
     """Custom Page to filter noisy JS console messages"""
     def javaScriptConsoleMessage(self, level, message, lineNumber, sourceID):
+        # Info 级别消息（AI 页面流式输出时每秒上百条）直接丢弃
+        if level == QWebEnginePage.JavaScriptConsoleMessageLevel.InfoMessageLevel:
+            return
         # Filter out common noisy warnings
-        if "ResizeObserver" in message or "Content Security Policy" in message:
+        if _CONSOLE_FILTER_RE.search(message):
             return
         super().javaScriptConsoleMessage(level, message, lineNumber, sourceID)
 
@@ -55,21 +84,33 @@ class DownloadManager(QObject):
              root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.dir = os.path.join(root_dir, "download")
         os.makedirs(self.dir, exist_ok=True)
+        # 已有文件名集合：冲突探测改为内存查找，避免逐个 exists 的 stat 循环
+        self._existing = None
+
+    def _refresh_existing(self):
+        try:
+            with os.scandir(self.dir) as it:
+                self._existing = {entry.name for entry in it}
+        except OSError:
+            self._existing = set()
 
     def handle_download(self, item: QWebEngineDownloadRequest):
         """直接保存到 download 文件夹，不弹窗"""
+        if self._existing is None:
+            self._refresh_existing()
+
         filename = item.downloadFileName()
-        save_path = os.path.join(self.dir, filename)
-        
-        # 如果文件已存在，添加序号
+        # 如果文件已存在，添加序号（纯内存判重，O(1) 查找）
         base, ext = os.path.splitext(filename)
         counter = 1
-        while os.path.exists(save_path):
-            save_path = os.path.join(self.dir, f"{base}_{counter}{ext}")
+        while filename in self._existing:
+            filename = f"{base}_{counter}{ext}"
             counter += 1
-        
+        self._existing.add(filename)
+        save_path = os.path.join(self.dir, filename)
+
         item.setDownloadDirectory(self.dir)
-        item.setDownloadFileName(os.path.basename(save_path))
+        item.setDownloadFileName(filename)
         item.accept()
         item.stateChanged.connect(lambda: self._finish(item, save_path))
 
@@ -82,6 +123,41 @@ class DownloadManager(QObject):
         """打开下载文件夹"""
         QDesktopServices.openUrl(QUrl.fromLocalFile(self.dir))
 
+class _DownloadScanSignals(QObject):
+    scanned = pyqtSignal(list)
+
+class _DownloadScanTask(QRunnable):
+    """后台扫描下载目录，按修改时间降序返回文件路径列表"""
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        self.signals = _DownloadScanSignals()
+
+    def run(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.is_file():
+                        entries.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            pass
+        entries.sort(reverse=True)
+        self.signals.scanned.emit([path for _, path in entries])
+
+# 服务表：namedtuple + 预构造 QUrl，全部实例共享，避免每次实例化重建 dict/QUrl
+# persistent=False 的服务无需保留登录态，使用内存 Profile（不落盘）
+Svc = namedtuple("Svc", "key name url persistent pdf_viewer")
+SERVICES = (
+    Svc("chatgpt", "ChatGPT", QUrl("https://chatgpt.com/"), True, False),
+    Svc("gemini", "Gemini", QUrl("https://gemini.google.com/"), True, False),
+    Svc("doubao", "豆包", QUrl("https://www.doubao.com/chat/"), True, False),
+    Svc("deepseek", "DeepSeek", QUrl("https://chat.deepseek.com/"), True, False),
+    Svc("grok", "Grok", QUrl("https://grok.com/"), True, False),
+    Svc("doc2x", "Doc2X", QUrl("https://doc2x.noedgeai.com/"), False, True),
+    Svc("scholar", "Google学术", QUrl("https://scholar.google.com/"), False, False),
+)
+
 class AIWebViewer(QWidget):
     serviceChanged = pyqtSignal(str)
     closeRequested = pyqtSignal()  # 关闭信号，用于返回 PDF 视图
@@ -89,18 +165,43 @@ class AIWebViewer(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.dl_mgr = DownloadManager(self)
-        
+
+        # 所有服务共享一个持久化 Profile：共用 Chromium 网络栈、HTTP 缓存和
+        # Cookie 存储（各站点登录按域名隔离），避免每个服务单独一套磁盘缓存分区
+        if getattr(sys, 'frozen', False):
+            base_cache = os.path.dirname(sys.executable)
+        else:
+            base_cache = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self._base_cache = base_cache
+        shared_cache = os.path.join(base_cache, "analysis", "cache_shared")
+        os.makedirs(shared_cache, exist_ok=True)
+
+        self.profile = QWebEngineProfile("insightpaper_ai", self)
+        self.profile.setPersistentStoragePath(shared_cache)
+        self.profile.setCachePath(shared_cache)
+        self.profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
+        self.profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
+        self.profile.setHttpCacheMaximumSize(256 * 1024 * 1024)
+        self.profile.downloadRequested.connect(self.dl_mgr.handle_download)
+
+        # 遥测/广告请求拦截器（所有 Profile 共用）
+        self._url_interceptor = TrackerBlockInterceptor(self)
+        self.profile.setUrlRequestInterceptor(self._url_interceptor)
+
+        # 无登录态服务的 off-the-record Profile（按需创建，纯内存，无 SQLite/缓存写盘）
+        self._otr_profile = None
+
+        # 下载目录扫描缓存：目录 mtime 未变时跳过重新遍历
+        self._dl_files_cache = None
+        self._dl_dir_mtime = None
+        # path -> 截断后的显示名缓存，热路径重开弹层时零字符串运算
+        self._display_cache = {}
+
         # --- Service Configuration ---
-        self.services = [
-            {"key": "chatgpt", "name": "ChatGPT", "url": "https://chatgpt.com/"},
-            {"key": "gemini",  "name": "Gemini",  "url": "https://gemini.google.com/"},
-            {"key": "doubao",  "name": "豆包",      "url": "https://www.doubao.com/chat/"},
-            {"key": "deepseek","name": "DeepSeek","url": "https://chat.deepseek.com/"},
-            {"key": "grok",    "name": "Grok",    "url": "https://grok.com/"},
-            {"key": "doc2x",   "name": "Doc2X",   "url": "https://doc2x.noedgeai.com/"},
-            {"key": "scholar", "name": "Google学术","url": "https://scholar.google.com/"}
-        ]
-        
+        self.services = SERVICES
+        # key -> index 映射，避免各处硬编码下标（服务顺序调整时不会错位）
+        self._key_to_index = {s.key: i for i, s in enumerate(self.services)}
+
         self.init_ui()
 
     def init_ui(self):
@@ -123,7 +224,7 @@ class AIWebViewer(QWidget):
         self.btn_dl.clicked.connect(self.show_downloads)
         
         self.btn_refresh = TransparentToolButton(FIF.SYNC, self)
-        self.btn_refresh.clicked.connect(lambda: self.stack.currentWidget().reload())
+        self.btn_refresh.clicked.connect(self._reload_current)
         
         # 关闭按钮 - 点击返回 PDF 视图
         self.btn_close = TransparentToolButton(FIF.CLOSE, self)
@@ -146,49 +247,74 @@ class AIWebViewer(QWidget):
 
         # Stacked Widget
         self.stack = QStackedWidget()
-        if getattr(sys, 'frozen', False):
-            base_cache = os.path.dirname(sys.executable)
-        else:
-            base_cache = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        for svc in self.services:
-            view = self.create_web_view(
-                svc["name"], 
-                os.path.join(base_cache, "analysis", f"cache_{svc['key']}"), 
-                svc["url"]
-            )
-            self.stack.addWidget(view)
-            
+
+        # 懒加载：每个服务先放占位 QWidget，首次切换到该服务时才创建真正的 WebView
+        # （每个 WebView 都会启动 Chromium 渲染进程并立即发起网络请求，开销很大）
+        self._loaded = [False] * len(self.services)
+        for _ in self.services:
+            self.stack.addWidget(QWidget())
+
         layout.addWidget(self.stack)
-        
+
         # 默认加载第一个服务（ChatGPT），无需用户选择
         if self.services:
             first_svc = self.services[0]
+            self._ensure_view(0)
             self.stack.setCurrentIndex(0)
-            self.lbl_title.setText(first_svc["name"])
+            self.lbl_title.setText(first_svc.name)
 
-    def create_web_view(self, name, cache_path, url):
-        os.makedirs(cache_path, exist_ok=True)
+    def _ensure_view(self, index):
+        """按需创建指定服务的 WebView 并替换占位符（每个服务只发生一次）"""
+        svc = self.services[index]
+        if self._loaded[index]:
+            return self.stack.widget(index)
+
+        view = self.create_web_view(svc.url, persistent=svc.persistent,
+                                    pdf_viewer=svc.pdf_viewer)
+        placeholder = self.stack.widget(index)
+        self.stack.removeWidget(placeholder)
+        placeholder.deleteLater()
+        self.stack.insertWidget(index, view)
+        self._loaded[index] = True
+        return view
+
+    def _reload_current(self):
+        view = self._ensure_view(self.stack.currentIndex())
+        view.reload()
+
+    def _get_otr_profile(self):
+        """返回共享的 off-the-record Profile（无名 Profile 即纯内存模式）"""
+        if self._otr_profile is None:
+            self._otr_profile = QWebEngineProfile(self)
+            self._otr_profile.downloadRequested.connect(self.dl_mgr.handle_download)
+            self._otr_profile.setUrlRequestInterceptor(self._url_interceptor)
+        return self._otr_profile
+
+    def create_web_view(self, url, persistent=True, pdf_viewer=False):
         view = QWebEngineView()
-        
-        profile = QWebEngineProfile(name, view)
-        profile.setPersistentStoragePath(cache_path)
-        profile.setCachePath(cache_path)
-        profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
         # Note: No custom UserAgent, No injection script (as requested)
-        
-        profile.downloadRequested.connect(self.dl_mgr.handle_download)
-        
+        profile = self.profile if persistent else self._get_otr_profile()
         page = WebEnginePage(profile, view)
         view.setPage(page)
-        view.setUrl(QUrl(url))
+
+        # 关闭聊天页面用不到的渲染特性，减少 GPU 进程唤醒和渲染进程内存
+        s = view.settings()
+        s.setAttribute(QWebEngineSettings.WebAttribute.WebGLEnabled, False)
+        s.setAttribute(QWebEngineSettings.WebAttribute.Accelerated2dCanvasEnabled, False)
+        s.setAttribute(QWebEngineSettings.WebAttribute.PluginsEnabled, False)
+        s.setAttribute(QWebEngineSettings.WebAttribute.AutoLoadIconsForPage, False)
+        # Doc2X 需要内置 PDF 预览，其余服务禁用
+        s.setAttribute(QWebEngineSettings.WebAttribute.PdfViewerEnabled, pdf_viewer)
+
+        view.setUrl(url if isinstance(url, QUrl) else QUrl(url))
         return view
 
     def pop_out_current(self):
         """Pop out current view to new window"""
-        current_view = self.stack.currentWidget()
-        if not current_view: return
-        
+        index = self.stack.currentIndex()
+        if index < 0: return
+        current_view = self._ensure_view(index)
+
         popup = PopupWindow(current_view.page().profile(), self.window())
         popup.webview.setUrl(current_view.url())
         popup.setWindowTitle(f"登录 - {self.lbl_title.text()}")
@@ -200,13 +326,13 @@ class AIWebViewer(QWidget):
     def pop_out_service(self, service_key):
         """Pop out a specific service by key for login"""
         for i, svc in enumerate(self.services):
-            if svc["key"] == service_key:
-                view = self.stack.widget(i)
+            if svc.key == service_key:
+                view = self._ensure_view(i)
                 if not view: return
-                
+
                 popup = PopupWindow(view.page().profile(), self.window())
                 popup.webview.setUrl(view.url())
-                popup.setWindowTitle(f"登录 - {svc['name']}")
+                popup.setWindowTitle(f"登录 - {svc.name}")
                 popup.resize(1200, 800)
                 popup.show()
                 popup.popoutClosed.connect(view.reload)
@@ -215,12 +341,19 @@ class AIWebViewer(QWidget):
     def show_menu(self):
         menu = RoundMenu(parent=self)
         for i, svc in enumerate(self.services):
-            action = Action(FIF.CHAT, svc["name"])
-            action.triggered.connect(lambda _, idx=i, n=svc["name"], k=svc["key"]: self.switch_service(idx, n, k))
+            action = Action(FIF.CHAT, svc.name)
+            # 统一绑定到同一个槽，数据放在 action 上，避免为每项分配闭包
+            action.setData((i, svc.name, svc.key))
+            action.triggered.connect(self._on_svc_action)
             menu.addAction(action)
         menu.exec(QCursor.pos(), aniType=MenuAnimationType.DROP_DOWN)
 
+    def _on_svc_action(self):
+        index, name, key = self.sender().data()
+        self.switch_service(index, name, key)
+
     def switch_service(self, index, name, key):
+        self._ensure_view(index)
         self.stack.setCurrentIndex(index)
         self.lbl_title.setText(name)
         self.serviceChanged.emit(key)
@@ -228,25 +361,10 @@ class AIWebViewer(QWidget):
     def on_download_success(self, path):
         InfoBar.success("下载完成", os.path.basename(path), duration=2000, parent=self)
 
-    def load_chatgpt(self):
-        """Switch to ChatGPT WebView"""
-        self.switch_service(0, "ChatGPT", "chatgpt")
-
-    def load_gemini(self):
-        """Switch to Gemini WebView"""
-        self.switch_service(1, "Gemini", "gemini")
-
-    def load_doubao(self):
-        """Switch to Doubao WebView"""
-        self.switch_service(2, "豆包", "doubao")
-
-    def load_deepseek(self):
-        """Switch to DeepSeek WebView"""
-        self.switch_service(3, "DeepSeek", "deepseek")
-        
-    def load_grok(self):
-        """Switch to Grok WebView"""
-        self.switch_service(4, "Grok", "grok")
+    def load_service(self, key):
+        """按 key 切换到对应服务 WebView"""
+        index = self._key_to_index[key]
+        self.switch_service(index, self.services[index].name, key)
 
     def show_downloads(self):
         """显示下载列表 - 显示 download 文件夹中的所有文件，支持拖动"""
@@ -254,92 +372,132 @@ class AIWebViewer(QWidget):
         from PyQt6.QtGui import QDrag
         from PyQt6.QtCore import QMimeData
         
-        # 获取 download 文件夹中的所有文件
-        download_files = []
-        if os.path.exists(self.dl_mgr.dir):
-            for f in os.listdir(self.dl_mgr.dir):
-                full_path = os.path.join(self.dl_mgr.dir, f)
-                if os.path.isfile(full_path):
-                    download_files.append(full_path)
-            # 按修改时间排序（最新的在前）
-            download_files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-        
+        # 目录 mtime 未变时复用缓存；否则先弹出空列表，后台扫描完成后回填
+        try:
+            cur_mtime = os.stat(self.dl_mgr.dir).st_mtime_ns
+        except OSError:
+            cur_mtime = None
+
+        cached_files = None
+        if cur_mtime is not None and cur_mtime == self._dl_dir_mtime and self._dl_files_cache is not None:
+            cached_files = self._dl_files_cache
+
         container = QWidget()
         container.setFixedWidth(300)
         container.setStyleSheet("background: white; border-radius: 8px;")
-        
+
         layout = QVBoxLayout(container)
         layout.setContentsMargins(10, 10, 10, 10)
         layout.setSpacing(8)
-        
+
         # 标题栏
         header = QHBoxLayout()
-        title = QLabel(f"下载 ({len(download_files)})")
+        title = QLabel("下载")
         title.setStyleSheet("font-weight: bold; font-size: 14px; color: #333;")
-        
+
         # 打开文件夹按钮
         open_folder_btn = TransparentToolButton(FIF.FOLDER, container)
         open_folder_btn.setToolTip("打开下载文件夹")
         open_folder_btn.clicked.connect(self.dl_mgr.open_download_folder)
-        
+
         header.addWidget(title)
         header.addStretch()
         header.addWidget(open_folder_btn)
         layout.addLayout(header)
-        
+
+        # 创建可拖动的列表
+        file_list = DraggableDownloadList(container)
+        file_list.setStyleSheet("""
+            QListWidget {
+                border: none;
+                background: transparent;
+            }
+            QListWidget::item {
+                padding: 4px 8px;
+                border-radius: 4px;
+                color: #333;
+            }
+            QListWidget::item:hover {
+                background: #f0f0f0;
+                color: #333;
+            }
+            QListWidget::item:selected {
+                background: #e3f2fd;
+                color: #333;
+            }
+        """)
+        layout.addWidget(file_list)
+
+        if cached_files is not None:
+            self._populate_download_list(title, file_list, cached_files)
+        else:
+            # 冷扫描走后台线程（网络盘/冷缓存时 stat 可能阻塞数百毫秒）
+            task = _DownloadScanTask(self.dl_mgr.dir)
+
+            def on_scanned(files, mtime=cur_mtime, title=title, file_list=file_list):
+                self._dl_files_cache = files
+                self._dl_dir_mtime = mtime
+                try:
+                    self._populate_download_list(title, file_list, files)
+                except RuntimeError:
+                    pass  # 弹层已关闭，控件已销毁
+
+            task.signals.scanned.connect(on_scanned)
+            QThreadPool.globalInstance().start(task)
+
+        Flyout.make(container, self.btn_dl, self, aniType=FlyoutAnimationType.DROP_DOWN)
+
+    def _populate_download_list(self, title, file_list, download_files):
+        """填充下载列表（同步路径与后台扫描回调共用）"""
+        title.setText(f"下载 ({len(download_files)})")
+        file_list.clear()
+
         if not download_files:
-            empty_label = QLabel("下载文件夹为空")
-            empty_label.setStyleSheet("color: #999; font-size: 12px;")
-            layout.addWidget(empty_label)
+            empty_item = QListWidgetItem("下载文件夹为空")
+            empty_item.setFlags(Qt.ItemFlag.NoItemFlags)
+            file_list.addItem(empty_item)
         else:
-            # 创建可拖动的列表
-            file_list = DraggableDownloadList(container)
-            file_list.setStyleSheet("""
-                QListWidget {
-                    border: none;
-                    background: transparent;
-                }
-                QListWidget::item {
-                    padding: 4px 8px;
-                    border-radius: 4px;
-                    color: #333;
-                }
-                QListWidget::item:hover {
-                    background: #f0f0f0;
-                    color: #333;
-                }
-                QListWidget::item:selected {
-                    background: #e3f2fd;
-                    color: #333;
-                }
-            """)
-            
+            old_cache = self._display_cache
+            new_cache = {}
             for path in download_files:
-                filename = os.path.basename(path)
-                # 截断过长的文件名
-                display_name = filename if len(filename) <= 35 else filename[:32] + "..."
-                
+                display_name = old_cache.get(path)
+                if display_name is None:
+                    filename = os.path.basename(path)
+                    # 截断过长的文件名
+                    display_name = filename if len(filename) <= 35 else filename[:32] + "..."
+                new_cache[path] = display_name
+
                 item = QListWidgetItem(display_name)
                 item.setToolTip(path)
                 item.setData(Qt.ItemDataRole.UserRole, path)
                 file_list.addItem(item)
-            
-            # 设置固定高度，最多显示 8 个文件
-            item_height = 28
-            max_items = 8
-            list_height = min(len(download_files), max_items) * item_height + 10
-            file_list.setFixedHeight(list_height)
-            
-            layout.addWidget(file_list)
-        
-        Flyout.make(container, self.btn_dl, self, aniType=FlyoutAnimationType.DROP_DOWN)
-    
+            # 只保留本次扫描仍存在的条目，删除的文件随之逐出
+            self._display_cache = new_cache
+
+        # 设置固定高度，最多显示 8 个文件
+        item_height = 28
+        max_items = 8
+        list_height = min(max(len(download_files), 1), max_items) * item_height + 10
+        file_list.setFixedHeight(list_height)
+
+
     def _open_file_location(self, file_path):
         """打开文件所在位置"""
-        if os.path.exists(file_path):
-            # Windows: 使用 explorer 并选中文件
-            import subprocess
-            subprocess.run(['explorer', '/select,', file_path])
+        if not os.path.exists(file_path):
+            return
+        if sys.platform == 'win32':
+            # 直接调用 Shell API 选中文件：无子进程 fork，不阻塞 GUI 线程
+            try:
+                import ctypes
+                pidl = ctypes.windll.shell32.ILCreateFromPathW(file_path)
+                if pidl:
+                    ctypes.windll.shell32.SHOpenFolderAndSelectItems(pidl, 0, None, 0)
+                    ctypes.windll.shell32.ILFree(pidl)
+                    return
+            except Exception as e:
+                print(f"SHOpenFolderAndSelectItems failed: {e}")
+        # 其他平台/失败回退：打开所在目录
+        QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.dirname(file_path)))
 
 
 class DraggableDownloadList(QListWidget):
@@ -348,7 +506,18 @@ class DraggableDownloadList(QListWidget):
         super().__init__(parent)
         self.setDragEnabled(True)
         self.setDragDropMode(QAbstractItemView.DragDropMode.DragOnly)
-    
+        # 拖动缓存：预览图与 QUrl 在同名文件重复拖动时复用，条目删除时逐出
+        self._pixmap_cache = {}
+        self._url_cache = {}
+        self.model().rowsAboutToBeRemoved.connect(self._evict_drag_caches)
+
+    def _evict_drag_caches(self, parent, first, last):
+        for row in range(first, last + 1):
+            item = self.item(row)
+            if item:
+                self._pixmap_cache.pop(item.text(), None)
+                self._url_cache.pop(item.data(Qt.ItemDataRole.UserRole), None)
+
     def startDrag(self, supportedActions):
         item = self.currentItem()
         if not item:
@@ -361,7 +530,7 @@ class DraggableDownloadList(QListWidget):
         # 创建拖动对象
         drag = QDrag(self)
         mime_data = QMimeData()
-        mime_data.setUrls([QUrl.fromLocalFile(file_path)])
+        mime_data.setUrls([self._url_cache.setdefault(file_path, QUrl.fromLocalFile(file_path))])
         drag.setMimeData(mime_data)
         
         # 创建拖动预览
@@ -374,34 +543,32 @@ class DraggableDownloadList(QListWidget):
     
     def _create_drag_pixmap(self, item):
         """创建拖动预览图像"""
-        from PyQt6.QtGui import QPixmap, QPainter, QColor, QFont, QPen, QBrush
-        
+        from PyQt6.QtGui import QPainter, QColor, QFont, QFontMetrics, QPen
+        from modules.draggable_list import create_drag_background
+
         filename = item.text()
-        
-        # 创建预览图像
-        width = min(280, len(filename) * 7 + 24)
+        cached = self._pixmap_cache.get(filename)
+        if cached is not None:
+            return cached
+
+        # 创建预览图像（按实际字体宽度计算，避免估算误差）
+        font = QFont()
+        font.setPointSize(9)
+        width = min(280, QFontMetrics(font).horizontalAdvance(filename) + 24)
         height = 32
-        
-        pixmap = QPixmap(width, height)
-        pixmap.fill(QColor(0, 0, 0, 0))
-        
+
+        # 蓝色底 + 蓝色边框，底图由模板拼接，文字单独叠加
+        pixmap = create_drag_background(width, height, "#e3f2fd", "#90caf9")
+
         painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # 绘制背景
-        painter.setBrush(QBrush(QColor("#e3f2fd")))
-        painter.setPen(QPen(QColor("#90caf9"), 1.5))
-        painter.drawRoundedRect(1, 1, width - 2, height - 2, 5, 5)
-        
         # 绘制文件名
         painter.setPen(QPen(QColor("#1976d2")))
-        font = QFont()
-        font.setPointSize(9)
         painter.setFont(font)
         painter.drawText(12, 21, filename)
         
         painter.end()
-        
+
+        self._pixmap_cache[filename] = pixmap
         return pixmap
 
     @property
@@ -1,11 +1,79 @@
 import os
 import sys
 import shutil
-from PyQt6.QtWidgets import QAbstractItemView, QLabel
-from PyQt6.QtGui import QDrag, QPixmap, QPainter, QColor, QFont, QPen, QBrush
-from PyQt6.QtCore import Qt, QMimeData, QUrl, QSize
+from PyQt6.QtWidgets import QAbstractItemView, QLabel, QStyledItemDelegate
+from PyQt6.QtGui import QDrag, QPixmap, QPainter, QColor, QFont, QFontMetrics, QPen, QBrush
+from PyQt6.QtCore import Qt, QMimeData, QUrl, QSize, QTimer, QRect
 from qfluentwidgets import ListWidget, MessageBox, InfoBar, InfoBarPosition
 
+# 拖拽高亮颜色存储的角色（由 HighlightDelegate 读取）
+_HIGHLIGHT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+# 拖动预览底图模板缓存：按 (背景色, 边框色) 各渲染一次圆角矩形
+_DRAG_TEMPLATE_CACHE = {}
+
+def create_drag_background(width, height, bg_color, border_color):
+    """生成拖动预览底图：圆角矩形模板只做一次抗锯齿渲染，之后按宽度三段拼接"""
+    template = _DRAG_TEMPLATE_CACHE.get((bg_color, border_color))
+    if template is None:
+        template = QPixmap(64, height)
+        template.fill(QColor(0, 0, 0, 0))
+        painter = QPainter(template)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setBrush(QBrush(QColor(bg_color)))
+        painter.setPen(QPen(QColor(border_color), 1.5))
+        painter.drawRoundedRect(1, 1, 62, height - 2, 5, 5)
+        painter.end()
+        _DRAG_TEMPLATE_CACHE[(bg_color, border_color)] = template
+
+    pixmap = QPixmap(width, height)
+    pixmap.fill(QColor(0, 0, 0, 0))
+    painter = QPainter(pixmap)
+    # 左右端保留圆角，中段水平拉伸；高度固定，无需纵向切片
+    edge = 8
+    painter.drawPixmap(QRect(0, 0, edge, height), template, QRect(0, 0, edge, height))
+    painter.drawPixmap(QRect(edge, 0, width - 2 * edge, height),
+                       template, QRect(edge, 0, 64 - 2 * edge, height))
+    painter.drawPixmap(QRect(width - edge, 0, edge, height),
+                       template, QRect(64 - edge, 0, edge, height))
+    painter.end()
+    return pixmap
+
+class HighlightDelegate(QStyledItemDelegate):
+    """在 paint 中直接填充高亮背景，避免 setBackground 触发的属性/样式分支"""
+    def paint(self, painter, option, index):
+        color = index.data(_HIGHLIGHT_ROLE)
+        if color:
+            painter.fillRect(option.rect, QColor(color))
+        super().paint(painter, option, index)
+
+def _fast_copy(src, dst):
+    """快速复制：优先内核级拷贝，避免 GUI 线程上的 Python 分块读写循环"""
+    if sys.platform == 'win32':
+        # CopyFileW 整个拷贝在内核内完成，不占用 GIL
+        try:
+            import ctypes
+            if ctypes.windll.kernel32.CopyFileW(str(src), str(dst), False):
+                return
+        except Exception:
+            pass
+    elif hasattr(os, 'copy_file_range'):
+        # Linux：copy_file_range 支持 reflink（btrfs/XFS 上接近 O(1)）
+        try:
+            remaining = os.stat(src).st_size
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+    # 回退到通用实现
+    shutil.copy2(src, dst)
+
 class DraggableListWidget(ListWidget):
     """支持拖放的列表组件"""
     def __init__(self, topic_manager, parent=None):
@@ -17,10 +85,32 @@ class DraggableListWidget(ListWidget):
         # 允许外部拖放，但我们要小心处理内部移动
         self.setDragDropMode(QAbstractItemView.DragDropMode.DragDrop)
         
-        # 高亮相关
+        # 高亮相关（由委托绘制，见 HighlightDelegate）
+        self.setItemDelegate(HighlightDelegate(self))
         self._highlight_item = None
         self._drag_source_item = None
 
+        # 拖拽高亮节流：鼠标移动事件可达 ~100/s，合并到 60Hz 再做 itemAt 查找
+        self._pending_pos = None
+        self._hl_timer = QTimer(self)
+        self._hl_timer.setSingleShot(True)
+        self._hl_timer.setInterval(16)
+        self._hl_timer.timeout.connect(self._apply_pending_highlight)
+
+        # 拖动缓存：预览图与 QUrl 在同一文件重复拖动时复用，条目删除时逐出
+        self._pixmap_cache = {}
+        self._url_cache = {}
+        self.model().rowsAboutToBeRemoved.connect(self._evict_drag_caches)
+
+    def _evict_drag_caches(self, parent, first, last):
+        for row in range(first, last + 1):
+            item = self.item(row)
+            data = item.data(Qt.ItemDataRole.UserRole) if item else None
+            if data and data.get('type') == 'pdf':
+                path = data.get('path', '')
+                self._pixmap_cache.pop(os.path.basename(path), None)
+                self._url_cache.pop(path, None)
+
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             event.accept()
@@ -34,13 +124,22 @@ class DraggableListWidget(ListWidget):
             event.accept()
         else:
             super().dragMoveEvent(event)
-        
-        # 更新高亮效果
-        target_item = self.itemAt(event.position().toPoint())
+
+        # 更新高亮效果（只记录位置，定时器到点后统一处理）
+        self._pending_pos = event.position().toPoint()
+        if not self._hl_timer.isActive():
+            self._hl_timer.start()
+
+    def _apply_pending_highlight(self):
+        if self._pending_pos is None:
+            return
+        target_item = self.itemAt(self._pending_pos)
         self._update_highlight(target_item)
 
     def dragLeaveEvent(self, event):
         """拖拽离开时清除高亮"""
+        self._hl_timer.stop()
+        self._pending_pos = None
         self._clear_highlight()
         super().dragLeaveEvent(event)
     
@@ -55,17 +154,21 @@ class DraggableListWidget(ListWidget):
             data = target_item.data(Qt.ItemDataRole.UserRole)
             if data and data.get('type') in ['topic', 'group']:
                 # 主题/组：高亮为蓝色背景
-                target_item.setBackground(QColor("#e3f2fd"))
-                self._highlight_item = target_item
+                target_item.setData(_HIGHLIGHT_ROLE, "#e3f2fd")
             elif data and data.get('type') == 'pdf':
                 # PDF：高亮为浅色，表示会放到同级目录
-                target_item.setBackground(QColor("#f5f5f5"))
-                self._highlight_item = target_item
-    
+                target_item.setData(_HIGHLIGHT_ROLE, "#f5f5f5")
+            else:
+                return
+            self._highlight_item = target_item
+            # 只重绘目标行，不做整表失效
+            self.viewport().update(self.visualItemRect(target_item))
+
     def _clear_item_highlight(self, item):
         """清除单个项的高亮"""
         if item:
-            item.setBackground(QColor(0, 0, 0, 0))  # 透明背景
+            item.setData(_HIGHLIGHT_ROLE, None)
+            self.viewport().update(self.visualItemRect(item))
     
     def _clear_highlight(self):
         """清除所有高亮"""
@@ -74,7 +177,9 @@ class DraggableListWidget(ListWidget):
             self._highlight_item = None
 
     def dropEvent(self, event):
-        # 清除高亮
+        # 清除高亮（含尚未生效的节流更新）
+        self._hl_timer.stop()
+        self._pending_pos = None
         self._clear_highlight()
         
         # 判断是否为内部拖拽：
@@ -175,22 +280,19 @@ class DraggableListWidget(ListWidget):
                 print("Main window not found")
                 return
                 
-            # 支持打包后的环境
-            if getattr(sys, 'frozen', False):
-                project_root = os.path.dirname(sys.executable)
-            else:
-                project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            analysis_root = os.path.join(project_root, 'analysis')
-            
-            target_filename = os.path.basename(target_path)
-            target_name_no_ext = os.path.splitext(target_filename)[0]
-            target_analysis_dir = os.path.join(analysis_root, target_name_no_ext)
-            translation_path = os.path.join(target_analysis_dir, 'Translation.pdf')
-            
+            # 目标 analysis 路径直接取主窗口的缓存（路径拆解只做一次）
+            paths = main_window._analysis_paths(target_path)
+            target_analysis_dir = paths['target_dir']
+            translation_path = paths['trans_path']
+
             source_filename = os.path.basename(source_path)
-            
-            # 检查是否已存在翻译版
-            is_replace = os.path.exists(translation_path)
+
+            # 检查是否已存在翻译版（EAFP：单次 stat 代替 exists 探测）
+            try:
+                os.stat(translation_path)
+                is_replace = True
+            except OSError:
+                is_replace = False
             
             title = '替换翻译版' if is_replace else '加载翻译版'
             if is_replace:
@@ -213,8 +315,8 @@ class DraggableListWidget(ListWidget):
                     # 创建分析目录
                     os.makedirs(target_analysis_dir, exist_ok=True)
                     
-                    # 复制文件作为翻译版
-                    shutil.copy2(source_path, translation_path)
+                    # 复制文件作为翻译版（内核级拷贝）
+                    _fast_copy(source_path, translation_path)
                     
                     # 刷新列表显示（显示绿点）
                     self.topic_manager.refresh_list_display()
@@ -240,8 +342,8 @@ class DraggableListWidget(ListWidget):
                         parent=main_window
                     )
             
-            # 延迟 100ms 执行，确保拖放事件完成
-            QTimer.singleShot(100, show_dialog)
+            # 延迟到下一轮事件循环执行，保证在 drop 事件返回之后弹窗且无人为延迟
+            QTimer.singleShot(0, show_dialog)
             
         except Exception as e:
             print(f"Error in _handle_translation_drop: {e}")
@@ -265,7 +367,7 @@ class DraggableListWidget(ListWidget):
         
         # Set URLs for external drag (e.g. to Browser, Desktop)
         file_path = data['path']
-        url = QUrl.fromLocalFile(file_path)
+        url = self._url_cache.setdefault(file_path, QUrl.fromLocalFile(file_path))
         mime_data.setUrls([url])
         
         drag.setMimeData(mime_data)
@@ -285,43 +387,39 @@ class DraggableListWidget(ListWidget):
     
     def _create_drag_pixmap(self, item):
         """创建拖动时的预览图像"""
-        import os
-        
         # 获取文件名
         data = item.data(Qt.ItemDataRole.UserRole)
         if not data:
             return None
-        
+
         file_path = data.get('path', '')
-        filename = os.path.basename(file_path)
-        
+        full_name = os.path.basename(file_path)
+        cached = self._pixmap_cache.get(full_name)
+        if cached is not None:
+            return cached
+
         # 截断过长的文件名
+        filename = full_name
         max_len = 35
         if len(filename) > max_len:
             filename = filename[:max_len-3] + '...'
-        
-        # 创建预览图像
-        width = min(280, len(filename) * 7 + 24)
+
+        # 创建预览图像（按实际字体宽度计算，避免估算误差）
+        font = QFont()
+        font.setPointSize(9)
+        width = min(280, QFontMetrics(font).horizontalAdvance(filename) + 24)
         height = 32
         
-        pixmap = QPixmap(width, height)
-        pixmap.fill(QColor(0, 0, 0, 0))  # 透明背景
-        
+        # 米黄色底 + 浅棕色边框，底图由模板拼接，文字单独叠加
+        pixmap = create_drag_background(width, height, "#fffdf7", "#d0c8b8")
+
         painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # 绘制米黄色圆角矩形背景 + 边框
-        painter.setBrush(QBrush(QColor("#fffdf7")))  # 米黄色背景
-        painter.setPen(QPen(QColor("#d0c8b8"), 1.5))  # 浅棕色边框
-        painter.drawRoundedRect(1, 1, width - 2, height - 2, 5, 5)
-        
         # 绘制文件名（深色文字）
         painter.setPen(QPen(QColor("#333333")))
-        font = QFont()
-        font.setPointSize(9)
         painter.setFont(font)
         painter.drawText(12, 21, filename)
-        
+
         painter.end()
-        
+
+        self._pixmap_cache[full_name] = pixmap
         return pixmap
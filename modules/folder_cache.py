@@ -0,0 +1,78 @@
+"""
+文件夹扫描缓存模块
+以 (路径, mtime_ns) 指纹持久化 load_folder 的扫描结果，
+目录树未变化时跳过重新遍历，减少启动时的磁盘 I/O
+"""
+
+import os
+import json
+
+CACHE_FILENAME = ".tree_cache.json"
+
+
+def _collect_dir_mtimes(root, topics):
+    """收集根目录及所有主题/组目录的 mtime_ns 指纹"""
+    mtimes = {}
+    try:
+        mtimes['.'] = os.stat(root).st_mtime_ns
+        for topic_name, t_data in topics.items():
+            topic_dir = os.path.join(root, topic_name)
+            mtimes[topic_name] = os.stat(topic_dir).st_mtime_ns
+            for group_name in t_data['groups']:
+                group_dir = os.path.join(topic_dir, group_name)
+                mtimes[os.path.join(topic_name, group_name)] = os.stat(group_dir).st_mtime_ns
+    except OSError:
+        return None
+    return mtimes
+
+
+def load_cached_tree(root):
+    """
+    尝试从缓存加载扫描结果
+    返回 (pdf_files, topics)；指纹不匹配或缓存缺失时返回 None
+    """
+    cache_path = os.path.join(root, CACHE_FILENAME)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    mtimes = data.get('mtimes')
+    topics = data.get('topics')
+    pdf_files = data.get('pdf_files')
+    if not isinstance(mtimes, dict) or not isinstance(topics, dict) or not isinstance(pdf_files, list):
+        return None
+
+    # 校验指纹：根目录及每个主题/组目录的 mtime 都必须一致
+    current = _collect_dir_mtimes(root, topics)
+    if current is None or current != mtimes:
+        return None
+
+    # JSON 将元组序列化为列表，恢复为 (filename, full_path) 元组
+    return [tuple(item) for item in pdf_files], topics
+
+
+def save_tree_cache(root, pdf_files, topics):
+    """保存扫描结果及目录指纹到缓存文件"""
+    cache_path = os.path.join(root, CACHE_FILENAME)
+    try:
+        # 首次创建缓存文件会改变根目录 mtime，先确保文件存在再采集指纹
+        if not os.path.exists(cache_path):
+            open(cache_path, 'a').close()
+    except OSError:
+        return
+
+    mtimes = _collect_dir_mtimes(root, topics)
+    if mtimes is None:
+        return
+    data = {
+        'mtimes': mtimes,
+        'pdf_files': pdf_files,
+        'topics': topics,
+    }
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"Failed to save tree cache: {e}")
@@ -1,316 +1,457 @@
-from PyQt6.QtWidgets import QGraphicsRectItem, QToolTip, QMenu, QGraphicsSimpleTextItem
-from PyQt6.QtCore import Qt, QRectF, QTimer
-from PyQt6.QtGui import QColor, QPen, QBrush, QClipboard, QGuiApplication, QAction, QCursor
-import fitz
-
-class PDFTextSelector:
-    """
-    Handles text selection logic for the PDFGraphicsView.
-    Uses 'Scheme 1': RubberBand selection -> Coordinate Mapping -> fitz text extraction.
-    """
-    def __init__(self, view):
-        self.view = view
-        self.start_pos = None
-        self.selection_rect_item = None
-        self.is_selecting = False
-        self.extracted_text = ""
-        
-        # Visual styling for the selection box
-        # Visual styling: Modern dashed line
-        self.pen = QPen(QColor(0, 90, 158), 1.5, Qt.PenStyle.DashLine)
-        self.brush = QBrush(QColor(0, 120, 215, 30))
-        
-        # Initialize the graphics item
-        self._init_graphics_item()
-
-    def _init_graphics_item(self):
-        self.selection_rect_item = QGraphicsRectItem()
-        self.selection_rect_item.setPen(self.pen)
-        self.selection_rect_item.setBrush(self.brush)
-        self.selection_rect_item.setZValue(999) # Ensure it's on top
-        self.selection_rect_item.hide()
-        
-        # Info text item for character count
-        self.info_text_item = QGraphicsSimpleTextItem()
-        self.info_text_item.setBrush(QBrush(QColor("black"))) # Text color
-        self.info_text_item.setZValue(1000) # Above rect
-        self.info_text_item.hide()
-        
-        # Add to scene if scene exists, else wait
-        if self.view.scene_obj:
-            self.view.scene_obj.addItem(self.selection_rect_item)
-            self.view.scene_obj.addItem(self.info_text_item)
-
-    def start_selection(self, scene_pos):
-        """Called on mouse press"""
-        self.is_selecting = True
-        self.start_pos = scene_pos
-        self.extracted_text = ""
-        
-        # Ensure item is valid and in scene
-        try:
-            # Check if C++ object is still valid by accessing a property
-            _ = self.selection_rect_item.scene()
-        except RuntimeError:
-            self._init_graphics_item()
-
-        if self.selection_rect_item is None:
-             self._init_graphics_item()
-        
-        # Check scene match and re-add if needed
-        current_scene = self.view.scene_obj
-        if self.selection_rect_item.scene() != current_scene:
-            if self.selection_rect_item.scene():
-                self.selection_rect_item.scene().removeItem(self.selection_rect_item)
-            current_scene.addItem(self.selection_rect_item)
-            
-        if self.info_text_item.scene() != current_scene:
-            if self.info_text_item.scene():
-                self.info_text_item.scene().removeItem(self.info_text_item)
-            current_scene.addItem(self.info_text_item)
-            
-        self.selection_rect_item.setRect(QRectF(scene_pos, scene_pos))
-        self.selection_rect_item.show()
-        
-        # Show info item initially empty or 0
-        self.info_text_item.setText("0 字")
-        self.info_text_item.setPos(scene_pos.x() + 10, scene_pos.y() - 20)
-        self.info_text_item.show()
-
-    def update_selection(self, scene_pos):
-        """Called on mouse move"""
-        if not self.is_selecting or not self.start_pos:
-            return
-            
-        rect = QRectF(self.start_pos, scene_pos).normalized()
-        self.selection_rect_item.setRect(rect)
-        
-        # Update Info Text Position (follow top-right corner of selection)
-        self.info_text_item.setPos(rect.topRight().x() + 5, rect.topRight().y() - 20)
-        
-        # Perform dynamic extraction to count characters
-        self._extract_text_from_rect(rect)
-        count = len(self.extracted_text)
-        self.info_text_item.setText(f"{count} 字")
-
-    def end_selection(self, scene_pos):
-        """Called on mouse release"""
-        if not self.is_selecting:
-            return
-            
-        self.is_selecting = False
-        final_rect = self.selection_rect_item.rect()
-        self.selection_rect_item.hide()
-        self.info_text_item.hide() # Hide info text
-        
-        # Perform final extraction（确保即使没有鼠标移动也能提取）
-        self._extract_text_from_rect(final_rect)
-        
-        if self.extracted_text:
-            self._copy_to_clipboard()
-
-    def _extract_text_from_rect(self, scene_rect):
-        """
-        Maps the scene_rect to PDF page coordinates and extracts text using fitz.
-        """
-        # 安全检查文档是否可用（未关闭）
-        if not self._is_doc_valid():
-            return
-
-        full_text = []
-        
-        # Iterate over all page items to see which ones intersect with the selection
-        for i, item in enumerate(self.view.page_items):
-            item_rect = item.sceneBoundingRect()
-            
-            # Check intersection
-            if item_rect.intersects(scene_rect):
-                # 1. Get the intersection rect in scene coords
-                intersect_rect = item_rect.intersected(scene_rect)
-                
-                # 2. Map to item local coords (pixel coords on the rendered image)
-                # item_rect.topLeft() is the scene pos of the page
-                local_x = intersect_rect.x() - item_rect.x()
-                local_y = intersect_rect.y() - item_rect.y()
-                local_w = intersect_rect.width()
-                local_h = intersect_rect.height()
-                
-                # 3. Map to PDF coords
-                # The image was rendered with self.view.base_scale
-                scale = self.view.base_scale
-                pdf_rect = fitz.Rect(
-                    local_x / scale,
-                    local_y / scale,
-                    (local_x + local_w) / scale,
-                    (local_y + local_h) / scale
-                )
-                
-                # 4. Extract text from the page
-                try:
-                    page = self.view.doc.load_page(i)
-                    # "text" gives plain text, "blocks" gives structure. 
-                    text = page.get_text("text", clip=pdf_rect, sort=True)
-                    if text.strip():
-                        # 清理换行：处理连字符断行和单换行
-                        cleaned_text = text.replace("-\n", "").replace("- \n", "")
-                        # 暂时保护段落（双换行）
-                        cleaned_text = cleaned_text.replace("\n\n", "[[PARA]]")
-                        # 将单换行替换为空格
-                        cleaned_text = cleaned_text.replace("\n", " ")
-                        # 恢复段落
-                        cleaned_text = cleaned_text.replace("[[PARA]]", "\n\n")
-                        # 压缩多余空格
-                        import re
-                        cleaned_text = re.sub(r' +', ' ', cleaned_text)
-                        
-                        full_text.append(cleaned_text.strip())
-                except Exception:
-                    pass
-
-        self.extracted_text = "\n\n".join(full_text)
-        
-        # 智能去重：检测并移除连续重复的文本
-        self.extracted_text = self._deduplicate_text(self.extracted_text)
-    
-    def _deduplicate_text(self, text):
-        """
-        智能去重：检测并移除连续重复的文本片段
-        例如："章节 章节" -> "章节"
-               "2.4.1河道分割 2.4.1河道分割 图4" -> "2.4.1河道分割 图4"
-        """
-        if not text or len(text) < 2:
-            return text
-        
-        original_text = text
-        
-        # 策略0: 强力二分去重 (针对翻译版图层重叠导致的 "ABC ABC" 或 "ABCABC")
-        # 扫描可能的分割点，允许中间有少量差异字符
-        extracted_len = len(text)
-        center = extracted_len // 2
-        # 搜索范围：中间位置前后 10% 或至少 10 个字符
-        search_radius = max(5, extracted_len // 10)
-        
-        start_search = max(1, center - search_radius)
-        end_search = min(extracted_len, center + search_radius + 1)
-        
-        for i in range(start_search, end_search):
-            part1 = text[:i].strip()
-            part2 = text[i:].strip()
-            # 只有当两部分有足够长度且内容相同时才认为是重复
-            # 增加长度限制防止误伤短词
-            if len(part1) > 2 and part1 == part2:
-                 return part1
-        
-        # 策略1: 检测完全重复模式（如 "ABAB" -> "AB"）
-        text_len = len(text)
-        for pattern_len in range(text_len // 2, 0, -1):
-            pattern = text[:pattern_len]
-            if text == pattern * (text_len // pattern_len) + text[:text_len % pattern_len]:
-                return pattern
-        
-        # 策略2: 检测词级别的连续重复（针对中文/英文混合文本）
-        # 分割成词（按空格和标点）
-        import re
-        # 使用正则分割保留分隔符
-        tokens = re.split(r'(\s+|[，。！？、；：""''（）\[\]【】])', text)
-        
-        # 查找并移除连续重复的词序列
-        i = 0
-        result_tokens = []
-        while i < len(tokens):
-            token = tokens[i]
-            
-            # 查找以当前 token 开始的重复序列
-            max_repeat_len = 0
-            for seq_len in range(1, (len(tokens) - i) // 2 + 1):
-                # 检查从 i 开始长度为 seq_len 的序列是否在 i+seq_len 位置重复
-                if i + seq_len * 2 <= len(tokens):
-                    seq1 = tokens[i:i+seq_len]
-                    seq2 = tokens[i+seq_len:i+seq_len*2]
-                    if seq1 == seq2:
-                        max_repeat_len = seq_len
-            
-            if max_repeat_len > 0:
-                # 找到重复，只保留一次
-                result_tokens.extend(tokens[i:i+max_repeat_len])
-                i += max_repeat_len * 2  # 跳过两次重复
-            else:
-                result_tokens.append(token)
-                i += 1
-        
-        deduplicated = ''.join(result_tokens)
-        
-        if deduplicated != original_text:
-            return deduplicated
-        
-        return text
-
-
-
-    def _is_doc_valid(self):
-        """安全检查文档是否有效且未关闭"""
-        if not hasattr(self.view, 'doc') or self.view.doc is None:
-            return False
-        try:
-            # 尝试访问文档的简单属性来检查是否已关闭
-            _ = self.view.doc.is_closed
-            return not self.view.doc.is_closed
-        except (AttributeError, ValueError, RuntimeError):
-            # 如果文档已关闭或无效，返回 False
-            return False
-
-    def _on_text_extracted(self):
-        """Handle the extracted text (Menu or Clipboard)"""
-        if not self.extracted_text:
-            return
-            
-        from qfluentwidgets import RoundMenu, Action, MenuAnimationType, FluentIcon as FIF
-        
-        # Show a fluent menu at cursor position
-        menu = RoundMenu(parent=self.view)
-        
-        # Info Action
-        count = len(self.extracted_text)
-        info_action = Action(FIF.ALBUM, f"选中 {count} 个字符")
-        info_action.setEnabled(False)
-        menu.addAction(info_action)
-        
-        # Translate Action
-        translate_action = Action(FIF.CHAT, "翻译 (Doubao)")
-        translate_action.triggered.connect(self._request_translation)
-        menu.addAction(translate_action)
-        
-        menu.addSeparator()
-        
-        # Copy Action
-        copy_action = Action(FIF.COPY, "复制文本")
-        copy_action.triggered.connect(self._copy_to_clipboard)
-        menu.addAction(copy_action)
-        
-        menu.exec(QCursor.pos(), aniType=MenuAnimationType.DROP_DOWN)
-
-    def _copy_to_clipboard(self):
-        clipboard = QGuiApplication.clipboard()
-        clipboard.setText(self.extracted_text)
-        
-        # Show Fluent Success InfoBar/StateToolTip
-        from qfluentwidgets import InfoBar, InfoBarPosition
-        
-        # We need a widget to anchor the InfoBar to. The view or its window.
-        # InfoBar needs a parent widget.
-        parent_widget = self.view.window() 
-        
-        InfoBar.success(
-            title='复制成功',
-            content='文本已复制到剪贴板',
-            orient=Qt.Orientation.Horizontal,
-            isClosable=True,
-            position=InfoBarPosition.TOP_RIGHT,
-            duration=1500,
-            parent=parent_widget
-        )
-
-    def _request_translation(self):
-        """Emit signal to request translation"""
-        if self.extracted_text and hasattr(self.view, 'translationRequested'):
-            self.view.translationRequested.emit(self.extracted_text)
+import re
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from PyQt6.QtWidgets import (QGraphicsRectItem, QToolTip, QMenu,
+                             QGraphicsSimpleTextItem, QGraphicsItem, QGraphicsView)
+from PyQt6.QtCore import Qt, QRectF, QTimer
+from PyQt6.QtGui import QColor, QPen, QBrush, QClipboard, QGuiApplication, QAction, QCursor
+from PyQt6 import sip
+import fitz
+
+class PDFTextSelector:
+    """
+    Handles text selection logic for the PDFGraphicsView.
+    Uses 'Scheme 1': RubberBand selection -> Coordinate Mapping -> fitz text extraction.
+    """
+    def __init__(self, view):
+        self.view = view
+        self.start_pos = None
+        # 图形项在首次框选时才创建（多数阅读会话根本用不到）
+        self.selection_rect_item = None
+        self.info_text_item = None
+        self.is_selecting = False
+        self.extracted_text = ""
+
+        # 每页单词缓存：首次选择时解析一次内容流，之后拖动只做 bbox 过滤
+        self._words_cache = {}
+        # fitz.Page 对象缓存：load_page 每次都会重新解析页面对象
+        self._page_cache = {}
+        # 大跨页选择时并行解析单词表（每个任务用句柄池里独占的文档句柄）
+        self._pool = ThreadPoolExecutor(max_workers=4)
+        self._cached_doc_id = None
+
+        # 文档有效标志由视图信号维护，热路径上不再做属性探测 + 异常捕获
+        self._doc_valid = False
+        view.documentOpened.connect(lambda: setattr(self, '_doc_valid', True))
+        view.documentClosed.connect(self._on_document_closed)
+
+        # 拖动节流：选框矩形实时跟手，提示标签的刷新合并到 25Hz
+        self._pending_pos = None
+        self._update_timer = QTimer()
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(40)
+        self._update_timer.timeout.connect(self._do_update)
+        # 上次显示过的标签尺寸/位置，整像素没变就不重设文本、不移动
+        self._last_label_size = None
+        self._last_info_pos = None
+        # 复用同一个 QRectF，避免每个鼠标事件都 new 一个再 normalized()
+        self._scratch_rect = QRectF()
+        # 页面包围盒表 (x0, y0, x1, y1)：每次选择手势开始时取一次，
+        # 拖动期间不再每页每事件地调 sceneBoundingRect()
+        self._page_bboxes = None
+
+        # Visual styling for the selection box
+        # Visual styling: Modern dashed line
+        self.pen = QPen(QColor(0, 90, 158), 1.5, Qt.PenStyle.DashLine)
+        self.brush = QBrush(QColor(0, 120, 215, 30))
+
+    def _init_graphics_item(self):
+        self.selection_rect_item = QGraphicsRectItem()
+        self.selection_rect_item.setPen(self.pen)
+        self.selection_rect_item.setBrush(self.brush)
+        self.selection_rect_item.setZValue(999) # Ensure it's on top
+        # 设备坐标缓存：拖动时选框只做纹理搬移，不逐帧重新栅格化
+        self.selection_rect_item.setCacheMode(
+            QGraphicsItem.CacheMode.DeviceCoordinateCache)
+        # 显式关闭几何变更通知，setRect/setPos 不再回调 itemChange
+        self.selection_rect_item.setFlag(
+            QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges, False)
+        self.selection_rect_item.hide()
+
+        # Info text item for character count
+        self.info_text_item = QGraphicsSimpleTextItem()
+        self.info_text_item.setBrush(QBrush(QColor("black"))) # Text color
+        self.info_text_item.setZValue(1000) # Above rect
+        # 文本会变，用项坐标缓存：只在 setText 时重绘一次
+        self.info_text_item.setCacheMode(
+            QGraphicsItem.CacheMode.ItemCoordinateCache)
+        self.info_text_item.setFlag(
+            QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges, False)
+        self.info_text_item.hide()
+
+        # 脏区域不必为抗锯齿向外扩 2px 再重绘
+        # （视口更新模式由 PDFGraphicsView 自己统一设置）
+        self.view.setOptimizationFlag(
+            QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing, True)
+
+        # Add to scene if scene exists, else wait
+        if self.view.scene_obj:
+            self.view.scene_obj.addItem(self.selection_rect_item)
+            self.view.scene_obj.addItem(self.info_text_item)
+
+    def start_selection(self, scene_pos):
+        """Called on mouse press"""
+        self.is_selecting = True
+        self.start_pos = scene_pos
+        self.extracted_text = ""
+        self._last_label_size = None
+        self._last_info_pos = None
+        
+        # 懒创建；若 C++ 对象已被场景销毁则重建（sip.isdeleted 比捕获 RuntimeError 更直接）
+        if self.selection_rect_item is None or sip.isdeleted(self.selection_rect_item):
+            self._init_graphics_item()
+        
+        # Check scene match and re-add if needed
+        current_scene = self.view.scene_obj
+        if self.selection_rect_item.scene() != current_scene:
+            if self.selection_rect_item.scene():
+                self.selection_rect_item.scene().removeItem(self.selection_rect_item)
+            current_scene.addItem(self.selection_rect_item)
+            
+        if self.info_text_item.scene() != current_scene:
+            if self.info_text_item.scene():
+                self.info_text_item.scene().removeItem(self.info_text_item)
+            current_scene.addItem(self.info_text_item)
+            
+        self.selection_rect_item.setRect(QRectF(scene_pos, scene_pos))
+        self.selection_rect_item.show()
+        
+        # Show info item initially empty or 0
+        self.info_text_item.setText("0×0 px")
+        self.info_text_item.setPos(scene_pos.x() + 10, scene_pos.y() - 20)
+        self.info_text_item.show()
+
+        self._rebuild_page_bboxes()
+
+    def _rebuild_page_bboxes(self):
+        bboxes = []
+        for item in self.view.page_items:
+            r = item.sceneBoundingRect()
+            bboxes.append((r.x(), r.y(), r.right(), r.bottom()))
+        self._page_bboxes = bboxes
+        # 页面纵向排布，top/bottom 单调递增，可用二分直接定位候选页区间
+        self._page_tops = [b[1] for b in bboxes]
+        self._page_bottoms = [b[3] for b in bboxes]
+
+    def update_selection(self, scene_pos):
+        """Called on mouse move"""
+        if not self.is_selecting or not self.start_pos:
+            return
+            
+        x0, y0 = self.start_pos.x(), self.start_pos.y()
+        x1, y1 = scene_pos.x(), scene_pos.y()
+        self._scratch_rect.setCoords(min(x0, x1), min(y0, y1),
+                                     max(x0, x1), max(y0, y1))
+        # setRect 内部会拷贝，传同一个实例是安全的
+        self.selection_rect_item.setRect(self._scratch_rect)
+
+        # Update Info Text Position (follow top-right corner of selection)
+        # 亚像素移动不触发 setPos，免去无谓的场景项更新
+        nx, ny = int(max(x0, x1) + 5), int(min(y0, y1) - 20)
+        if (nx, ny) != self._last_info_pos:
+            self.info_text_item.setPos(nx, ny)
+            self._last_info_pos = (nx, ny)
+
+        # 标签刷新交给节流定时器，只处理最新位置
+        self._pending_pos = scene_pos
+        if not self._update_timer.isActive():
+            self._update_timer.start()
+
+    def _do_update(self):
+        """节流回调：拖动期间只显示选区像素尺寸，文本提取推迟到松开鼠标"""
+        if not self.is_selecting or self._pending_pos is None or not self.start_pos:
+            return
+        pos = self._pending_pos
+        self._pending_pos = None
+
+        size = (int(abs(pos.x() - self.start_pos.x())),
+                int(abs(pos.y() - self.start_pos.y())))
+        if size != self._last_label_size:
+            self.info_text_item.setText(f"{size[0]}×{size[1]} px")
+            self._last_label_size = size
+
+    def end_selection(self, scene_pos):
+        """Called on mouse release"""
+        if not self.is_selecting:
+            return
+            
+        self.is_selecting = False
+        self._update_timer.stop()
+        self._pending_pos = None
+        final_rect = self.selection_rect_item.rect()
+        self.selection_rect_item.hide()
+        self.info_text_item.hide() # Hide info text
+        
+        # Perform final extraction（确保即使没有鼠标移动也能提取）
+        self._extract_text_from_rect(final_rect)
+        
+        if self.extracted_text:
+            self._copy_to_clipboard()
+
+    def _extract_text_from_rect(self, scene_rect):
+        """
+        Maps the scene_rect to PDF page coordinates and extracts text using fitz.
+        """
+        # 文档未打开或已关闭时直接返回（标志由视图信号维护）
+        if not self._doc_valid:
+            return
+
+        # 文档切换时作废缓存
+        if id(self.view.doc) != self._cached_doc_id:
+            self._words_cache.clear()
+            self._page_cache.clear()
+            self._cached_doc_id = id(self.view.doc)
+
+        full_text = []
+
+        if self._page_bboxes is None or len(self._page_bboxes) != len(self.view.page_items):
+            self._rebuild_page_bboxes()
+
+        sel_left, sel_top = scene_rect.left(), scene_rect.top()
+        sel_right, sel_bottom = scene_rect.right(), scene_rect.bottom()
+
+        # 倒数提到循环外，页内坐标换算只做乘法
+        inv_scale = 1.0 / self.view.base_scale
+
+        # 二分出与选区纵向重叠的连续页区间（O(log N) 代替整表扫描）
+        i0 = bisect_right(self._page_bottoms, sel_top)
+        i1 = bisect_left(self._page_tops, sel_bottom)
+
+        # 先收集所有命中页及其 PDF 坐标选区
+        candidates = []
+        for i in range(i0, i1):
+            px0, py0, px1, py1 = self._page_bboxes[i]
+            # 纵向已由二分保证重叠，这里只剩横向判断
+            if px0 < sel_right and px1 > sel_left:
+                # 1. Intersection rect in scene coords
+                ix0 = max(px0, sel_left)
+                iy0 = max(py0, sel_top)
+                ix1 = min(px1, sel_right)
+                iy1 = min(py1, sel_bottom)
+
+                # 2. Map to item local coords (pixel coords on the rendered image)
+                local_x = ix0 - px0
+                local_y = iy0 - py0
+
+                # 3. Map to PDF coords
+                # The image was rendered with self.view.base_scale
+                pdf_rect = fitz.Rect(
+                    local_x * inv_scale,
+                    local_y * inv_scale,
+                    (local_x + (ix1 - ix0)) * inv_scale,
+                    (local_y + (iy1 - iy0)) * inv_scale
+                )
+                candidates.append((i, pdf_rect))
+
+        # 批量补齐单词缓存；跨页多时并行。注意 fitz 的 Document 及其
+        # Page 都不是线程安全的，共享 self.view.doc 会出数据竞争——
+        # 每个任务从句柄池拿自己独占的文档句柄（同 PageRenderWorker）
+        missing = [i for i, _ in candidates if i not in self._words_cache]
+        if missing:
+            try:
+                if len(missing) > 3 and self.view.current_path:
+                    from modules.pdf_viewer import _doc_pool
+                    path = self.view.current_path
+
+                    def _words_for(page_num):
+                        doc = _doc_pool.acquire(path)
+                        try:
+                            return doc.load_page(page_num).get_text("words")
+                        finally:
+                            _doc_pool.release(path, doc)
+
+                    for i, words in zip(missing, self._pool.map(_words_for, missing)):
+                        self._words_cache[i] = words
+                else:
+                    # 少量页走主线程的共享文档 + 页面缓存
+                    for i in missing:
+                        page = self._page_cache.get(i)
+                        if page is None:
+                            page = self._page_cache[i] = self.view.doc.load_page(i)
+                        self._words_cache[i] = page.get_text("words")
+            except Exception:
+                pass
+
+        for i, pdf_rect in candidates:
+            # 4. Extract text from the page
+            try:
+                words = self._words_cache.get(i)
+                if words is None:
+                    continue
+
+                # 命中单词按 (block, line, word_no) 排成阅读顺序后重组，
+                # 保持换行供下方清理逻辑使用
+                hits = [w for w in words if pdf_rect.intersects(fitz.Rect(w[:4]))]
+                hits.sort(key=lambda w: (w[5], w[6], w[7]))
+                parts = []
+                prev_block = None
+                for (block, _line), grp in groupby(hits, key=lambda w: (w[5], w[6])):
+                    if prev_block is not None:
+                        parts.append("\n\n" if block != prev_block else "\n")
+                    parts.append(" ".join(w[4] for w in grp))
+                    prev_block = block
+                text = "".join(parts)
+
+                if text.strip():
+                    # 清理换行：处理连字符断行和单换行
+                    cleaned_text = text.replace("-\n", "").replace("- \n", "")
+                    # 暂时保护段落（双换行）
+                    cleaned_text = cleaned_text.replace("\n\n", "[[PARA]]")
+                    # 将单换行替换为空格
+                    cleaned_text = cleaned_text.replace("\n", " ")
+                    # 恢复段落
+                    cleaned_text = cleaned_text.replace("[[PARA]]", "\n\n")
+                    # 压缩多余空格
+                    cleaned_text = re.sub(r' +', ' ', cleaned_text)
+
+                    full_text.append(cleaned_text.strip())
+            except Exception:
+                pass
+
+        self.extracted_text = "\n\n".join(full_text)
+        
+        # 智能去重：检测并移除连续重复的文本
+        self.extracted_text = self._deduplicate_text(self.extracted_text)
+    
+    def _deduplicate_text(self, text):
+        """
+        智能去重：检测并移除连续重复的文本片段
+        例如："章节 章节" -> "章节"
+               "2.4.1河道分割 2.4.1河道分割 图4" -> "2.4.1河道分割 图4"
+        """
+        if not text or len(text) < 2:
+            return text
+        
+        original_text = text
+        
+        # 策略0: 强力二分去重 (针对翻译版图层重叠导致的 "ABC ABC" 或 "ABCABC")
+        # 扫描可能的分割点，允许中间有少量差异字符
+        extracted_len = len(text)
+        center = extracted_len // 2
+        # 搜索范围：中间位置前后 10% 或至少 10 个字符
+        search_radius = max(5, extracted_len // 10)
+        
+        start_search = max(1, center - search_radius)
+        end_search = min(extracted_len, center + search_radius + 1)
+        
+        for i in range(start_search, end_search):
+            part1 = text[:i].strip()
+            part2 = text[i:].strip()
+            # 只有当两部分有足够长度且内容相同时才认为是重复
+            # 增加长度限制防止误伤短词
+            if len(part1) > 2 and part1 == part2:
+                 return part1
+        
+        # 策略1: 检测完全重复模式（如 "ABAB" -> "AB"）
+        text_len = len(text)
+        for pattern_len in range(text_len // 2, 0, -1):
+            pattern = text[:pattern_len]
+            if text == pattern * (text_len // pattern_len) + text[:text_len % pattern_len]:
+                return pattern
+        
+        # 策略2: 检测词级别的连续重复（针对中文/英文混合文本）
+        # 分割成词（按空格和标点）
+        import re
+        # 使用正则分割保留分隔符
+        tokens = re.split(r'(\s+|[，。！？、；：""''（）\[\]【】])', text)
+        
+        # 查找并移除连续重复的词序列
+        i = 0
+        result_tokens = []
+        while i < len(tokens):
+            token = tokens[i]
+            
+            # 查找以当前 token 开始的重复序列
+            max_repeat_len = 0
+            for seq_len in range(1, (len(tokens) - i) // 2 + 1):
+                # 检查从 i 开始长度为 seq_len 的序列是否在 i+seq_len 位置重复
+                if i + seq_len * 2 <= len(tokens):
+                    seq1 = tokens[i:i+seq_len]
+                    seq2 = tokens[i+seq_len:i+seq_len*2]
+                    if seq1 == seq2:
+                        max_repeat_len = seq_len
+            
+            if max_repeat_len > 0:
+                # 找到重复，只保留一次
+                result_tokens.extend(tokens[i:i+max_repeat_len])
+                i += max_repeat_len * 2  # 跳过两次重复
+            else:
+                result_tokens.append(token)
+                i += 1
+        
+        deduplicated = ''.join(result_tokens)
+        
+        if deduplicated != original_text:
+            return deduplicated
+        
+        return text
+
+
+
+    def _on_document_closed(self):
+        """文档关闭：置无效标志并丢弃指向已关闭文档的页面对象"""
+        self._doc_valid = False
+        self._page_cache.clear()
+        self._words_cache.clear()
+
+    def _on_text_extracted(self):
+        """Handle the extracted text (Menu or Clipboard)"""
+        if not self.extracted_text:
+            return
+            
+        from qfluentwidgets import RoundMenu, Action, MenuAnimationType, FluentIcon as FIF
+        
+        # Show a fluent menu at cursor position
+        menu = RoundMenu(parent=self.view)
+        
+        # Info Action
+        count = len(self.extracted_text)
+        info_action = Action(FIF.ALBUM, f"选中 {count} 个字符")
+        info_action.setEnabled(False)
+        menu.addAction(info_action)
+        
+        # Translate Action
+        translate_action = Action(FIF.CHAT, "翻译 (Doubao)")
+        translate_action.triggered.connect(self._request_translation)
+        menu.addAction(translate_action)
+        
+        menu.addSeparator()
+        
+        # Copy Action
+        copy_action = Action(FIF.COPY, "复制文本")
+        copy_action.triggered.connect(self._copy_to_clipboard)
+        menu.addAction(copy_action)
+        
+        menu.exec(QCursor.pos(), aniType=MenuAnimationType.DROP_DOWN)
+
+    def _copy_to_clipboard(self):
+        # 剪贴板写入在 X11/Wayland 上可能耗时（所有权转移），
+        # 推迟到下一轮事件循环，让 mouseRelease 先返回
+        QTimer.singleShot(0, self._do_copy)
+
+    def _do_copy(self):
+        clipboard = QGuiApplication.clipboard()
+        clipboard.setText(self.extracted_text)
+        
+        # Show Fluent Success InfoBar/StateToolTip
+        from qfluentwidgets import InfoBar, InfoBarPosition
+        
+        # We need a widget to anchor the InfoBar to. The view or its window.
+        # InfoBar needs a parent widget.
+        parent_widget = self.view.window() 
+        
+        InfoBar.success(
+            title='复制成功',
+            content='文本已复制到剪贴板',
+            orient=Qt.Orientation.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP_RIGHT,
+            duration=1500,
+            parent=parent_widget
+        )
+
+    def _request_translation(self):
+        """Emit signal to request translation"""
+        if self.extracted_text and hasattr(self.view, 'translationRequested'):
+            self.view.translationRequested.emit(self.extracted_text)
@@ -234,9 +234,28 @@ class TopicManager:
         # 保存当前选中状态
         current_item = list_widget.currentItem()
         selected_data = current_item.data(Qt.ItemDataRole.UserRole) if current_item else None
-        
+
+        # 批量填充：挂起重绘和信号，结束后一次性布局，避免逐项 addItem 的重复开销
+        list_widget.setUpdatesEnabled(False)
+        list_widget.blockSignals(True)
+        try:
+            self._populate_list(list_widget)
+        finally:
+            list_widget.blockSignals(False)
+            list_widget.setUpdatesEnabled(True)
+
+        # 恢复选中状态
+        if selected_data:
+            for i in range(list_widget.count()):
+                it = list_widget.item(i)
+                if it.data(Qt.ItemDataRole.UserRole) == selected_data:
+                    list_widget.setCurrentItem(it)
+                    break
+
+    def _populate_list(self, list_widget):
+        """实际构建列表项（由 refresh_list_display 在批量模式下调用）"""
         list_widget.clear()
-        
+
         pdf_files = self.main_window.pdf_files
         
         # 检查翻译文件是否存在 - 支持打包后的环境
@@ -286,31 +305,29 @@ class TopicManager:
                         bold=True, color="#0078d4")
 
 
-            is_expanded = topic in self.expanded_items
-            if is_expanded:
-                # 主题下的文件
-                for path in t_data['pdfs']:
-                    create_item(os.path.basename(path), 
-                                {'type': 'pdf', 'path': path, 'parent': topic}, 
-                                indent_level=1, 
+            # 子项始终预先创建，折叠通过隐藏行实现（见 _apply_expand_states）
+            # 主题下的文件
+            for path in t_data['pdfs']:
+                create_item(os.path.basename(path),
+                            {'type': 'pdf', 'path': path, 'parent': topic},
+                            indent_level=1,
+                            icon=self._green_dot_icon if has_trans(path) else None)
+
+            # 主题下的组
+            for group in sorted(t_data['groups'].keys()):
+                g_pdfs = t_data['groups'][group]
+                g_key = f"{topic}::{group}"
+
+                create_item(f"{group} ({len(g_pdfs)})",
+                            {'type': 'group', 'topic': topic, 'name': group},
+                            indent_level=1, color="#8764b8")
+
+                # 组下的文件
+                for path in g_pdfs:
+                    create_item(os.path.basename(path),
+                                {'type': 'pdf', 'path': path, 'parent': g_key},
+                                indent_level=2,
                                 icon=self._green_dot_icon if has_trans(path) else None)
-                
-                # 主题下的组
-                for group in sorted(t_data['groups'].keys()):
-                    g_pdfs = t_data['groups'][group]
-                    g_key = f"{topic}::{group}"
-                    
-                    create_item(f"{group} ({len(g_pdfs)})", 
-                                {'type': 'group', 'topic': topic, 'name': group}, 
-                                indent_level=1, color="#8764b8")
-                    
-                    if g_key in self.expanded_items:
-                        # 组下的文件
-                        for path in g_pdfs:
-                            create_item(os.path.basename(path), 
-                                        {'type': 'pdf', 'path': path, 'parent': g_key}, 
-                                        indent_level=2, 
-                                        icon=self._green_dot_icon if has_trans(path) else None)
 
         # 3. 底部空白占位符 (方便在列表满时也能右键点击空白处)
         spacer_item = QListWidgetItem("")
@@ -327,14 +344,30 @@ class TopicManager:
                 total_pdfs += len(g_pdfs)
                 
         self.main_window.pdf_count_label.setText(f"{total_pdfs} 篇论文")
-        
-        # 恢复选中状态
-        if selected_data:
-            for i in range(list_widget.count()):
-                it = list_widget.item(i)
-                if it.data(Qt.ItemDataRole.UserRole) == selected_data:
-                    list_widget.setCurrentItem(it)
-                    break
+
+        # 应用展开/折叠状态
+        self._apply_expand_states(list_widget)
+
+    def _apply_expand_states(self, list_widget):
+        """根据 expanded_items 就地显示/隐藏子项行，不重建列表"""
+        for i in range(list_widget.count()):
+            item = list_widget.item(i)
+            data = item.data(Qt.ItemDataRole.UserRole) or {}
+            itype = data.get('type')
+            hidden = False
+            if itype == 'group':
+                hidden = data['topic'] not in self.expanded_items
+            elif itype == 'pdf':
+                parent = data.get('parent')
+                if parent:
+                    parent = str(parent)
+                    if '::' in parent:
+                        topic = parent.split('::')[0]
+                        hidden = (topic not in self.expanded_items
+                                  or parent not in self.expanded_items)
+                    else:
+                        hidden = parent not in self.expanded_items
+            item.setHidden(hidden)
 
     # --- 核心功能：操作 (拖拽/重命名/删除) ---
 
@@ -639,6 +672,11 @@ class TopicManager:
             self.expanded_items.remove(item_key)
         else:
             self.expanded_items.add(item_key)
+
+    def toggle_expand_in_place(self, item_key):
+        """切换展开状态并就地更新行可见性，避免整表重建"""
+        self.toggle_expand(item_key)
+        self._apply_expand_states(self.main_window.pdf_list_widget)
             
     def show_context_menu(self, pos):
         """显示上下文菜单"""